@@ -10,6 +10,26 @@ import logging
 import gspread
 import subprocess
 import socket
+import queue
+import multiprocessing
+import threading
+import atexit
+import signal
+import glob
+import hashlib
+import unicodedata
+import base64
+import re
+import math
+import io
+import gzip
+import fnmatch
+import fcntl
+from collections import deque
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -19,9 +39,26 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import (
+    NoSuchElementException, TimeoutException, StaleElementReferenceException,
+    ElementClickInterceptedException, ElementNotInteractableException
+)
 from webdriver_manager.chrome import ChromeDriverManager
+from gspread.utils import rowcol_to_a1, numericise_all
 from google.oauth2.service_account import Credentials
 
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+except ImportError:
+    Fernet = None  # sin cryptography no se persiste la sesión
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None  # sin Pillow las capturas se guardan en el PNG original
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -35,14 +72,1105 @@ ESTADOS_VALIDOS_PROCESAR = [
     'READY', 'AUTOMATIZAR', 'SI', 'YES', 'PROCESO'
 ]
 
+# 🐢🐇 PERFILES DE RITMO PARA LA SIMULACIÓN HUMANA
+# factor: multiplica los rangos de _espera_humana
+# tipeo: pausa (min, max) entre caracteres; None = enviar el texto completo de una vez
+# mover_mouse / leer_pagina: activar o no esas simulaciones
+# llenado_masivo: llenar el formulario inicial en un solo execute_script
+# motivos: rango (min, max) fijo para esperas cuyo motivo contenga la clave (no se escala)
+# En config.json, 'perfiles_ritmo' puede agregar perfiles o pisar claves de los existentes.
+PERFILES_RITMO = {
+    'stealth': {
+        'factor': 1.5,
+        'tipeo': (0.08, 0.22),
+        'mover_mouse': True,
+        'leer_pagina': True,
+        'motivos': {
+            'descanso entre clientes': (15, 30),
+            'jitter humano': (0.8, 2.5),
+        }
+    },
+    'balanced': {
+        'factor': 1.0,
+        'tipeo': (0.05, 0.15),
+        'mover_mouse': True,
+        'leer_pagina': True,
+        'motivos': {}
+    },
+    'fast': {
+        'factor': 0.25,
+        'tipeo': None,
+        'mover_mouse': False,
+        'leer_pagina': False,
+        'llenado_masivo': True,
+        'motivos': {
+            'descanso entre clientes': (1, 2),
+            'jitter humano': (0.05, 0.2),
+        }
+    },
+}
+
+# 🅰️ SONDA DE ESTADO DE PÁGINA: Angular estable + XHR/fetch pendientes + objetivo presente
+SCRIPT_ESTADO_PAGINA = """
+    var selector = arguments[0], textoOpcion = arguments[1], selectsCargados = arguments[2];
+    
+    if (!window.__salvumRed) {
+        var red = window.__salvumRed = {pendientes: 0};
+        var terminar = function() { red.pendientes = Math.max(0, red.pendientes - 1); };
+        var sendOriginal = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function() {
+            red.pendientes++;
+            this.addEventListener('loadend', terminar);
+            return sendOriginal.apply(this, arguments);
+        };
+        if (window.fetch) {
+            var fetchOriginal = window.fetch;
+            window.fetch = function() {
+                red.pendientes++;
+                return fetchOriginal.apply(this, arguments).finally(terminar);
+            };
+        }
+    }
+    
+    var estable = true;
+    if (window.getAllAngularTestabilities) {
+        estable = window.getAllAngularTestabilities().every(function(t) { return t.isStable(); });
+    }
+    
+    var objetivo = true;
+    if (selector) {
+        var el = document.querySelector(selector);
+        objetivo = !!(el && el.offsetParent !== null);
+    }
+    var selects = Array.prototype.slice.call(document.querySelectorAll('select'));
+    if (objetivo && textoOpcion) {
+        objetivo = selects.some(function(s) {
+            return Array.prototype.some.call(s.options, function(o) {
+                return o.text.toLowerCase().indexOf(textoOpcion) !== -1;
+            });
+        });
+    }
+    if (objetivo && selectsCargados) {
+        objetivo = selects.filter(function(s) { return s.options.length > 1; }).length >= selectsCargados;
+    }
+    
+    return {
+        documento: document.readyState === 'complete',
+        estable: estable,
+        red: window.__salvumRed.pendientes,
+        objetivo: objetivo,
+        login: SCRIPT_LOGIN_VISIBLE
+    };
+"""
+
+# Señal de sesión perdida: estamos en /login o hay un formulario de login visible
+SCRIPT_LOGIN_VISIBLE = """(
+    location.pathname.toLowerCase().indexOf('/login') !== -1 ||
+    !!document.querySelector("input[id='Usuario'], input[type='password']")
+)"""
+SCRIPT_ESTADO_PAGINA = SCRIPT_ESTADO_PAGINA.replace('SCRIPT_LOGIN_VISIBLE', SCRIPT_LOGIN_VISIBLE)
+
+class SesionExpiradaError(Exception):
+    """El portal cerró la sesión (redirigió a login) en medio del flujo"""
+
+# 🚦 CLASES DE ERROR DEL FLUJO: los transitorios se reintentan en el paso donde ocurrieron
+class ErrorTransitorio(Exception):
+    """Falla que puede no repetirse: elemento stale, timeout, Angular inestable, red"""
+
+class ErrorPermanente(Exception):
+    """Rechazo del portal o error de validación: reintentar no cambia el resultado"""
+
+EXCEPCIONES_TRANSITORIAS = (
+    NoSuchElementException, TimeoutException, StaleElementReferenceException,
+    ElementClickInterceptedException, ElementNotInteractableException
+)
+# Mensajes (en minúsculas) de errores de red de la página o del renderer que también cuentan como transitorios
+MENSAJES_TRANSITORIOS = ['net::err_', 'timed out receiving message from renderer', 'read timed out']
+# El driver ya no responde: reintentar el paso no sirve, hay que reiniciar el navegador
+MENSAJES_NAVEGADOR_CAIDO = [
+    'chrome not reachable', 'invalid session id', 'session deleted', 'not connected to devtools',
+    'no such window', 'target window already closed', 'max retries exceeded', 'connection refused'
+]
+
+class NavegadorCaidoError(SesionExpiradaError):
+    """Chrome o chromedriver murieron: se reinicia el navegador y se vuelve a iniciar sesión"""
+
+# 🗂️ ESTADO LOCAL PERSISTENTE ENTRE EJECUCIONES
+DIRECTORIO_ESTADO = os.getenv('SALVUM_DIR_ESTADO', '.salvum_estado')
+ARCHIVO_PUNTOS_CONTROL = os.path.join(DIRECTORIO_ESTADO, 'checkpoint_planillas.json')
+
+# 🚗 CACHE LOCAL DE CHROMEDRIVER (una carpeta por versión mayor de Chrome)
+DIRECTORIO_CHROMEDRIVER = os.path.join(DIRECTORIO_ESTADO, 'chromedriver')
+BINARIOS_CHROME = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser']
+
+# 🚫 BLOQUEO DE RED POR CDP (Network.setBlockedURLs)
+# desactivado: nada | medir: no bloquea, cuenta lo que se habría bloqueado | bloquear: descarta lo que calce
+MODOS_BLOQUEO_RED = ['desactivado', 'medir', 'bloquear']
+# Comodines al estilo de setBlockedURLs ('*' = cualquier cosa); config 'bloqueo_red_patrones' agrega más
+PATRONES_BLOQUEO_RED = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.wav',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*hotjar.com*', '*clarity.ms*', '*newrelic.com*', '*nr-data.net*',
+]
+# Bytes promedio por tipo de recurso medidos en modo 'medir', para estimar el ahorro al bloquear
+ARCHIVO_PROMEDIOS_RED = os.path.join(DIRECTORIO_ESTADO, 'promedios_bloqueo_red.json')
+
+# 🍪 SESIÓN AUTENTICADA REUTILIZABLE (cookies + storage, cifrado con Fernet)
+URL_SALVUM = "https://prescriptores.salvum.cl"
+ARCHIVO_SESION = os.path.join(DIRECTORIO_ESTADO, 'sesion_salvum.enc')
+# Sal aleatoria de la derivación de la clave (se crea una vez; si se pierde, la sesión guardada ya no se descifra)
+ARCHIVO_SAL_SESION = os.path.join(DIRECTORIO_ESTADO, 'sesion_salvum.sal')
+ITERACIONES_CLAVE_SESION = 600000
+
+# Estados que ya no se vuelven a revisar en lectura incremental: ninguno está en ESTADOS_VALIDOS_PROCESAR,
+# así que no se reprocesan solos. Si alguien los vuelve a PROCESAR a mano, lo recoge el escaneo completo
+# periódico (escaneo_completo_cada).
+ESTADOS_TERMINALES = ['COMPLETADO', 'ERROR', 'DUPLICADO', 'REVISAR']
+
+# 🧠 ESTADÍSTICAS DE ESTRATEGIAS DE SELECCIÓN
+ARCHIVO_ESTADISTICAS_SELECTORES = os.path.join(DIRECTORIO_ESTADO, 'estadisticas_selectores.json')
+VENTANA_ESTADISTICAS = 20  # resultados recientes que cuentan para ordenar
+
+class EstadisticasSelectores:
+    """Historial reciente de éxito por estrategia, persistido entre ejecuciones"""
+    
+    def __init__(self, archivo=ARCHIVO_ESTADISTICAS_SELECTORES):
+        self.archivo = archivo
+        self._datos = None
+        self._nuevos = {}  # grupo -> estrategia -> resultados de este proceso aún no guardados
+    
+    def _cargar(self):
+        if self._datos is None:
+            self._datos = {}
+            if os.path.exists(self.archivo):
+                try:
+                    with open(self.archivo, 'r', encoding='utf-8') as f:
+                        self._datos = json.load(f)
+                except Exception as e:
+                    logger.warning(f"⚠️ Estadísticas de selectores ilegibles, se reinician: {e}")
+        return self._datos
+    
+    def tasa_reciente(self, grupo, estrategia):
+        historial = self._cargar().get(grupo, {}).get(estrategia, {}).get('historial', [])
+        # Sin historial: neutral, para que se pruebe antes que una estrategia que viene fallando
+        return sum(historial) / len(historial) if historial else 0.5
+    
+    def ordenar(self, grupo, estrategias):
+        """Estrategias por tasa de éxito reciente (empates: orden original)"""
+        return sorted(estrategias, key=lambda estrategia: -self.tasa_reciente(grupo, estrategia))
+    
+    @staticmethod
+    def _aplicar(datos, grupo, estrategia, resultado):
+        entrada = datos.setdefault(grupo, {}).setdefault(estrategia, {
+            'intentos': 0, 'exitos': 0, 'historial': []
+        })
+        entrada['intentos'] += resultado['intentos']
+        entrada['exitos'] += resultado['exitos']
+        entrada['historial'] = (entrada['historial'] + resultado['historial'])[-VENTANA_ESTADISTICAS:]
+        if 'ultimo_exito' in resultado:
+            entrada['ultimo_selector'] = resultado['ultimo_selector']
+            entrada['ultimo_exito'] = resultado['ultimo_exito']
+    
+    def registrar(self, grupo, estrategia, exito, selector=None):
+        resultado = {'intentos': 1, 'exitos': 1 if exito else 0, 'historial': [1 if exito else 0]}
+        if exito:
+            resultado['ultimo_selector'] = selector
+            resultado['ultimo_exito'] = datetime.now().isoformat()
+        self._aplicar(self._cargar(), grupo, estrategia, resultado)
+        self._aplicar(self._nuevos, grupo, estrategia, resultado)
+    
+    def guardar(self):
+        """Sumar lo nuevo de este proceso a lo que hay en disco (los workers del pool comparten el archivo)"""
+        if not self._nuevos:
+            return
+        try:
+            with _bloqueo_archivo(self.archivo):
+                datos = _leer_json(self.archivo, {})
+                for grupo, estrategias in self._nuevos.items():
+                    for estrategia, resultado in estrategias.items():
+                        self._aplicar(datos, grupo, estrategia, resultado)
+                _escribir_json_atomico(self.archivo, datos)
+            self._datos = datos
+            self._nuevos = {}
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron guardar estadísticas de selectores: {e}")
+
+# 📓 DIARIO DE PASOS POR CLIENTE (append-only, fsync en cada paso)
+ARCHIVO_DIARIO = os.path.join(DIRECTORIO_ESTADO, 'diario_clientes.jsonl')
+PASOS_DIARIO = ['iniciado', 'formulario', 'simulado', 'datos_personales', 'ubicacion', 'laboral', 'evaluado', 'completado', 'error']
+# Pasos después de los cuales la solicitud ya está enviada en el portal: no se repite
+PASOS_TERMINALES_DIARIO = ['evaluado', 'completado']
+
+class DiarioClientes:
+    """Diario JSONL del avance de cada cliente; sobrevive a un corte del runner"""
+    
+    def __init__(self, archivo=ARCHIVO_DIARIO):
+        self.archivo = archivo
+        self._archivo_abierto = None
+        self._lock = threading.Lock()
+        self._ultimos_de_sesion = {}  # clave -> último paso registrado por este proceso
+    
+    @staticmethod
+    def clave(cliente):
+        return f"{cliente['sheet_id']}:{cliente['row_number']}:{cliente['RUT']}"
+    
+    def registrar(self, cliente, paso, **datos):
+        """Agregar una línea y forzarla a disco antes de seguir"""
+        entrada = {'ts': time.time(), 'clave': self.clave(cliente), 'paso': paso, 'pid': os.getpid()}
+        entrada.update(datos)
+        linea = json.dumps(entrada, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._ultimos_de_sesion[entrada['clave']] = paso
+            try:
+                if self._archivo_abierto is None:
+                    os.makedirs(os.path.dirname(self.archivo), exist_ok=True)
+                    self._archivo_abierto = open(self.archivo, 'a+', encoding='utf-8')
+                    # Si un corte dejó una línea a medias, no pegarle la siguiente
+                    if self._archivo_abierto.tell() > 0:
+                        self._archivo_abierto.seek(self._archivo_abierto.tell() - 1)
+                        if self._archivo_abierto.read(1) != '\n':
+                            self._archivo_abierto.write('\n')
+                self._archivo_abierto.write(linea)
+                self._archivo_abierto.flush()
+                os.fsync(self._archivo_abierto.fileno())
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo escribir en el diario ({paso}): {e}")
+    
+    def ultimo_paso(self, cliente):
+        """Último paso que este proceso registró para el cliente (None si todavía ninguno)"""
+        return self._ultimos_de_sesion.get(self.clave(cliente))
+    
+    def ultimos_pasos(self, max_horas):
+        """Última entrada por cliente dentro de la ventana (líneas truncadas se ignoran)"""
+        limite = time.time() - max_horas * 3600
+        ultimos = {}
+        if not os.path.exists(self.archivo):
+            return ultimos
+        with open(self.archivo, 'r', encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    entrada = json.loads(linea)
+                except ValueError:
+                    continue
+                if entrada.get('ts', 0) >= limite:
+                    ultimos[entrada['clave']] = entrada
+        return ultimos
+    
+    def compactar(self, max_horas):
+        """Reescribir el diario con solo la última entrada vigente de cada cliente"""
+        ultimos = self.ultimos_pasos(max_horas)
+        with self._lock:
+            if self._archivo_abierto is not None:
+                self._archivo_abierto.close()
+                self._archivo_abierto = None
+            try:
+                temporal = self.archivo + '.tmp'
+                with open(temporal, 'w', encoding='utf-8') as f:
+                    for entrada in sorted(ultimos.values(), key=lambda e: e['ts']):
+                        f.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporal, self.archivo)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo compactar el diario: {e}")
+        return ultimos
+
+# 🧭 FLUJO DECLARATIVO DE LA SOLICITUD DE CRÉDITO (Nueva Solicitud → ... → Evaluación)
+# Cada paso se cronometra con su nombre y se ejecuta en este orden:
+#   listo: espera de página antes del paso (kwargs de _esperar_pagina_lista, motivo en 'motivo')
+#   campos: se llenan en orden; 'valor' es una plantilla sobre los datos del cliente ({rut}, {monto}...)
+#           y 'listo' en un campo espera la página después de llenarlo (p. ej. selects dependientes)
+#   accion: método propio del paso (ver _acciones_flujo)
+#   captura: screenshot con ese nombre (según la política de capturas)
+#   continuar: botón que se clickea (o solo una espera si no tiene selector) y la espera de la página siguiente
+#   diario: paso de DiarioClientes que se registra al terminar
+# requerido: si falla el flujo se corta con 'error'; si no, se sigue. timeout_seg recorta todas las
+# esperas y búsquedas del paso; reintentos: cuántas veces se vuelve a correr el paso completo ante un
+# ErrorTransitorio (por defecto 'reintentos_transitorios'; 0 en pasos que no se pueden repetir).
+# reanudable: si el diario de esta ejecución ya lo registró (la solicitud quedó enviada antes de
+# perder la sesión), no se repite.
+# En config.json, 'flujo_pasos' puede pisar claves por paso: {"simulacion": {"timeout_seg": 240}}.
+PASOS_FLUJO = [
+    {'nombre': 'nueva_solicitud', 'titulo': "🔘 PASO 1: Buscando botón Nueva Solicitud...",
+     'accion': 'ir_a_solicitudes', 'timeout_seg': 60,
+     'continuar': {'selector': "button[value='NUEVA SOLICITUD']", 'listo': {'selector': "input[id='RUT']"},
+                   'motivo': "cargando formulario de nueva solicitud"},
+     'error': "No se encontró botón Nueva Solicitud", 'captura_error': 'error_nueva_solicitud'},
+    
+    {'nombre': 'formulario_inicial', 'titulo': "📋 PASO 2: Llenando formulario inicial con selectores precisos...",
+     'llenado_masivo': True, 'timeout_seg': 120,
+     'campos': [
+         {'nombre': 'RUT', 'tipo': 'texto', 'icono': '🆔', 'selector': "input[id='RUT'][name='RUT']",
+          'alternativos': ["input[id='RUT']"], 'valor': '{rut}', 'requerido': True},
+         {'nombre': 'Número de Celular', 'tipo': 'texto', 'icono': '📱',
+          'selector': "input[id='Número de Celular'][name='Número de Celular']", 'valor': '{telefono}'},
+         {'nombre': 'Correo Electrónico', 'tipo': 'texto', 'icono': '📧',
+          'selector': "input[id='Correo electrónico'][name='Correo electrónico']", 'valor': '{email}'},
+         {'nombre': 'Nombre', 'tipo': 'texto', 'icono': '👤', 'selector': "input[id='Nombre'][name='Nombre']",
+          'valor': '{primer_nombre}'},
+         # VALOR FIJO: Gonzalez
+         {'nombre': 'Apellidos', 'tipo': 'texto', 'icono': '👨‍👩‍👧‍👦', 'selector': "input[id='Apellidos'][name='Apellidos']",
+          'valor': "Gonzalez"},
+         # VALOR FIJO: 1987-08-25 (campo date no interactuable, siempre por JavaScript)
+         {'nombre': 'Fecha de Nacimiento', 'tipo': 'fecha', 'icono': '🎂', 'selector': "input[type='date']",
+          'valor': "1987-08-25"},
+     ],
+     'captura': 'formulario_inicial_completado',
+     'continuar': {'selector': "button[value='CONTINUAR']", 'listo': {'texto_opcion': "casas modulares"},
+                   'motivo': "cargando página de financiamiento"},
+     'diario': 'formulario', 'error': "Error en formulario inicial"},
+    
+    {'nombre': 'carga_financiamiento', 'titulo': "📄 PÁGINA 2: Configuración de Financiamiento Angular",
+     'listo': {'texto_opcion': "casas modulares"}, 'motivo': "cargando página de financiamiento completamente",
+     'accion': 'resumen_pagina', 'captura': 'antes_seleccion_producto', 'timeout_seg': 60},
+    
+    {'nombre': 'producto', 'titulo': "🏠 Seleccionando: Casas modulares (Selectores precisos del DevTools)",
+     'timeout_seg': 90,
+     'campos': [
+         {'nombre': 'Producto', 'tipo': 'producto', 'icono': '🏠', 'valor': "Casas modulares", 'requerido': True,
+          'listo': {'selector': "form-money-amount[label='Valor del producto'] input"}},
+     ],
+     'error': "No se pudo seleccionar producto en componente Angular", 'captura_error': 'error_select_angular'},
+    
+    {'nombre': 'valor_producto', 'timeout_seg': 60,
+     'campos': [
+         {'nombre': 'Valor del producto', 'tipo': 'monto', 'icono': '💰',
+          'selector': "form-money-amount[label='Valor del producto'] input[id='import-simple']",
+          'alternativos': ["form-money-amount[label='Valor del producto'] input"],
+          'valor': '{monto}', 'requerido': True, 'listo': {}},
+     ],
+     'error': "No se pudo llenar valor del producto en componente Angular", 'captura_error': 'error_valor_angular'},
+    
+    {'nombre': 'monto_solicitado', 'timeout_seg': 60, 'requerido': False,
+     'campos': [
+         # No es crítico si falla, a veces solo hay un campo
+         {'nombre': 'Cuánto quieres solicitar', 'tipo': 'monto', 'icono': '💵',
+          'selector': "form-money-amount[label='¿Cuánto quieres solicitar?'] input[id='import-simple']",
+          'valor': '{monto}', 'listo': {}},
+     ],
+     'continuar': {'listo': {'texto_opcion': "cuota"}, 'motivo': "esperando carga dinámica de selects Angular"}},
+    
+    {'nombre': 'cuota', 'timeout_seg': 45, 'requerido': False,
+     'campos': [
+         {'nombre': 'Cuota', 'tipo': 'select', 'icono': '📊', 'select': {'contiene': "cuota"},
+          'opciones': [{'texto': "60 cuotas"}, {'texto': "60"}, {'texto': "60 CUOTAS"}], 'listo': {}},
+     ]},
+    
+    {'nombre': 'dia_vencimiento', 'timeout_seg': 60, 'requerido': False,
+     'campos': [
+         # Select con días y que no sea el de productos ni el de cuotas; si no hay "2", la primera opción
+         {'nombre': 'Día de Vencimiento', 'tipo': 'select', 'icono': '📅',
+          'select': {'alguna_de': ["2", "5", "10", "15"], 'excluye': ["cuota", "modular"]},
+          'opciones': [{'texto': "2"}, {'indice': 1}], 'listo': {}},
+     ],
+     'continuar': {'listo': {'selector': "button[value='SIMULAR']:not(.disable-button)"},
+                   'motivo': "procesamiento final Angular"}},
+    
+    {'nombre': 'simulacion', 'titulo': "🔘 Esperando que el botón SIMULAR se habilite (Angular)...",
+     'accion': 'simular', 'timeout_seg': 150,
+     'continuar': {'selector': "button[value='CONTINUAR']", 'listo': {'selector': "input[id='N° de serie C.I.']"},
+                   'motivo': "cargando información personal"},
+     'diario': 'simulado', 'error': "Error en simulación Angular", 'captura_error': 'error_simulacion_angular'},
+    
+    {'nombre': 'informacion_personal', 'titulo': "📄 PÁGINA 4: Información Personal",
+     'listo': {}, 'motivo': "cargando página información personal", 'timeout_seg': 90,
+     'campos': [
+         {'nombre': 'N° de serie C.I', 'tipo': 'texto', 'icono': '🆔',
+          'selector': "input[id='N° de serie C.I.'][name='N° de serie C.I.']", 'valor': "123456789"},
+         # Por valor primero para evitar el Soltero/a duplicado; último recurso: la última opción
+         {'nombre': 'Estado Civil', 'tipo': 'select', 'icono': '💑', 'select': {'posicion': 0},
+          'opciones': [{'valor': "7: Object"}, {'texto': "Soltero/a"}, {'indice': -1}]},
+     ],
+     'continuar': {'selector': "button[value='CONTINUAR']", 'listo': {'texto_opcion': "coquimbo"},
+                   'motivo': "cargando ubicación"},
+     'diario': 'datos_personales', 'error': "Error continuando información personal"},
+    
+    {'nombre': 'ubicacion', 'titulo': "📄 PÁGINA 5: Ubicación",
+     'listo': {}, 'motivo': "cargando página ubicación", 'timeout_seg': 120,
+     'campos': [
+         {'nombre': 'Región', 'tipo': 'select', 'icono': '🌎', 'select': {'posicion': 0},
+          'opciones': [{'texto': "COQUIMBO"}], 'listo': {'selects_cargados': 2}},
+         # Ciudad y comuna se cargan dinámicamente: primera opción disponible después de "Seleccione"
+         {'nombre': 'Ciudad', 'tipo': 'select', 'icono': '🏙️', 'select': {'posicion': 1},
+          'opciones': [{'indice': 1}], 'listo': {'selects_cargados': 3}},
+         {'nombre': 'Comuna', 'tipo': 'select', 'icono': '🏘️', 'select': {'posicion': 2},
+          'opciones': [{'indice': 1}]},
+         {'nombre': 'Dirección', 'tipo': 'texto', 'icono': '🏠',
+          'selector': "input[id='Dirección'][name='Dirección']", 'valor': "Avenida"},
+     ],
+     'continuar': {'selector': "button[value='CONTINUAR']", 'listo': {'texto_opcion': "jubilado"},
+                   'motivo': "cargando información laboral"},
+     'diario': 'ubicacion', 'error': "Error continuando ubicación"},
+    
+    {'nombre': 'informacion_laboral', 'titulo': "📄 PÁGINA 6: Información Laboral",
+     'listo': {}, 'motivo': "cargando página información laboral", 'timeout_seg': 90,
+     'campos': [
+         {'nombre': 'Modalidad de trabajo', 'tipo': 'select', 'icono': '💼', 'select': {'posicion': 0},
+          'opciones': [{'texto': "Jubilado"}]},
+         {'nombre': 'Última pensión líquida', 'tipo': 'texto', 'icono': '💰',
+          'selector': "input[id='import-simple'][name='import-simple']", 'valor': '{renta_liquida}'},
+     ],
+     'continuar': {'selector': "button[value='CONTINUAR']", 'listo': {'selector': "button[value='EVALUAR SOLICITUD']"},
+                   'motivo': "cargando página final"},
+     'diario': 'laboral', 'error': "Error continuando información laboral"},
+    
+    # Después de EVALUAR la solicitud queda enviada: si se pierde la sesión no se vuelve a enviar
+    {'nombre': 'evaluacion', 'titulo': "📄 PÁGINA 7: Evaluar Solicitud",
+     'listo': {}, 'motivo': "cargando página final", 'timeout_seg': 180, 'reanudable': True, 'reintentos': 0,
+     'continuar': {'selector': "button[value='EVALUAR SOLICITUD']", 'requerido': False, 'listo': {'timeout': 60},
+                   'motivo': "procesando evaluación final"},
+     'diario': 'evaluado'},
+    
+    {'nombre': 'registro_resultado', 'titulo': "📸 Capturando resultado final...",
+     'listo': {}, 'motivo': "cargando resultado final", 'accion': 'registrar_resultado', 'timeout_seg': 90,
+     'reintentos': 0},
+]
+
+# 📑 NOMBRES DE HOJA ACEPTADOS (en orden de preferencia)
+NOMBRES_HOJA_POSIBLES = ['Mis_Clientes_Financiamiento', 'sheet1', 'Hoja1', 'Sheet1']
+
+# 📋 COLUMNAS DE LA PLANILLA: campo lógico -> encabezados aceptados (ya normalizados)
+CAMPOS_PLANILLA = {
+    'procesar': ['PROCESAR'],
+    'renta_liquida': ['RENTA LIQUIDA'],
+    'nombre_cliente': ['NOMBRE CLIENTE'],
+    'rut': ['RUT'],
+    'email': ['EMAIL', 'CORREO', 'CORREO ELECTRONICO'],
+    'telefono': ['TELEFONO', 'CELULAR'],
+    'monto_financiamiento': ['MONTO FINANCIAMIENTO'],
+    'modelo_casa': ['MODELO CASA'],
+    'precio_casa': ['PRECIO CASA'],
+    'origen': ['ORIGEN'],
+    'fecha_proceso': ['FECHA PROCESO', 'FECHA PROCESADO', 'PROCESADO'],
+    'resultado': ['RESULTADO'],
+}
+
+# Si no hay coincidencia exacta, basta con que el encabezado contenga todas estas palabras
+PALABRAS_CAMPOS_CRITICOS = {
+    'procesar': ['PROCESAR'],
+    'renta_liquida': ['RENTA', 'LIQUIDA'],
+    'nombre_cliente': ['NOMBRE', 'CLIENTE'],
+}
+
+# 📦 CAMPOS QUE REALMENTE USA EL PARSER (el resto de la planilla no se descarga)
+CAMPOS_LECTURA = [
+    'procesar', 'renta_liquida', 'nombre_cliente', 'rut', 'email', 'telefono',
+    'monto_financiamiento', 'modelo_casa', 'precio_casa', 'origen'
+]
+
+def _normalizar_encabezado(texto):
+    """Mayúsculas, sin tildes y con espacios simples: 'Renta  Líquida ' -> 'RENTA LIQUIDA'"""
+    sin_tildes = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sin_tildes.upper().replace('_', ' ').split())
+
+def _normalizar_rut(rut):
+    """RUT comparable: sin puntos, guiones ni espacios, sin ceros a la izquierda y DV en mayúscula"""
+    return ''.join(c for c in str(rut) if c.isalnum()).upper().lstrip('0')
+
+# 👯 POLÍTICAS DE DEDUPLICACIÓN POR RUT: qué fila se procesa cuando el RUT se repite
+# primero: la primera en orden de config.json / fila; ultimo: la última; mayor_monto: la de mayor monto
+POLITICAS_DUPLICADOS = ['primero', 'ultimo', 'mayor_monto']
+
+@contextmanager
+def _bloqueo_archivo(archivo):
+    """Lock exclusivo entre procesos (flock sobre '<archivo>.lock') para leer-modificar-escribir"""
+    os.makedirs(os.path.dirname(os.path.abspath(archivo)), exist_ok=True)
+    with open(archivo + '.lock', 'a') as candado:
+        fcntl.flock(candado.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(candado.fileno(), fcntl.LOCK_UN)
+
+def _leer_json(archivo, por_defecto):
+    if not os.path.exists(archivo):
+        return por_defecto
+    try:
+        with open(archivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return por_defecto
+
+def _escribir_json_atomico(archivo, datos):
+    """Temporal propio del proceso + os.replace: nadie lee un JSON a medias"""
+    temporal = f"{archivo}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, archivo)
+
+def _percentil(valores, fraccion):
+    """Percentil por rango más cercano (valores no vacíos)"""
+    ordenados = sorted(valores)
+    posicion = max(0, math.ceil(fraccion * len(ordenados)) - 1)
+    return ordenados[posicion]
+
+def _resolver_columnas(encabezados):
+    """Construir {campo lógico: número de columna} a partir de la fila de encabezados"""
+    normalizados = [_normalizar_encabezado(h) for h in encabezados]
+    indice = {}
+    
+    for campo, alias in CAMPOS_PLANILLA.items():
+        for numero, encabezado in enumerate(normalizados, start=1):
+            if encabezado in alias:
+                indice[campo] = numero
+                break
+    
+    for campo, palabras in PALABRAS_CAMPOS_CRITICOS.items():
+        if campo in indice:
+            continue
+        for numero, encabezado in enumerate(normalizados, start=1):
+            if all(palabra in encabezado for palabra in palabras):
+                indice[campo] = numero
+                break
+    
+    return indice
+
+def _error_sugiere_hoja_renombrada(error):
+    """True si el error de la API indica que la hoja cacheada ya no existe con ese nombre"""
+    if isinstance(error, gspread.exceptions.WorksheetNotFound):
+        return True
+    if isinstance(error, gspread.exceptions.APIError):
+        texto = str(error)
+        return any(marca in texto for marca in ['Unable to parse range', 'NOT_FOUND', '404'])
+    return False
+
+# 📝 ESCRITURA DIFERIDA A PLANILLAS
+ARCHIVO_ESCRITURAS_PENDIENTES = os.path.join(DIRECTORIO_ESTADO, 'escrituras_pendientes_planillas.json')
+
+# 📈 MÉTRICAS OPENMETRICS (textfile para node_exporter o puerto local)
+# Contadores propios: nombre -> ayuda. Clientes por agente y duraciones por paso salen del estado del run.
+METRICAS_CONTADORES = {
+    'sheets_llamadas': 'Llamadas a la API de Google Sheets',
+    'sheets_errores': 'Llamadas a la API de Google Sheets que fallaron',
+    'login_intentos': 'Intentos de login por resultado',
+    'navegador_inicios': 'Navegadores Chrome iniciados (más de uno por worker = reinicio)',
+    'pasos_reintentos': 'Reintentos de pasos del flujo por error transitorio',
+    'clientes_fallidos_clase': 'Clientes marcados ERROR por clase de error',
+}
+BUCKETS_DURACION_PASO = [0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300]
+
+def _etiquetas_openmetrics(etiquetas):
+    if not etiquetas:
+        return ''
+    escapar = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escapar(v)}"' for k, v in etiquetas) + '}'
+
+class MetricasSalvum:
+    """Contadores en memoria, fusionables entre procesos (se envían como listas)"""
+    
+    def __init__(self):
+        self._contadores = {}  # (nombre, ((etiqueta, valor), ...)) -> total
+        self._lock = threading.Lock()
+    
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+    
+    def llamada_sheets(self, operacion, funcion, *args, **kwargs):
+        """Ejecutar una llamada a Sheets contándola (y su error, si falla)"""
+        self.incrementar('sheets_llamadas', operacion=operacion)
+        try:
+            return funcion(*args, **kwargs)
+        except Exception:
+            self.incrementar('sheets_errores', operacion=operacion)
+            raise
+    
+    def exportar(self):
+        with self._lock:
+            return [[nombre, list(etiquetas), valor] for (nombre, etiquetas), valor in self._contadores.items()]
+    
+    def fusionar(self, exportados):
+        for nombre, etiquetas, valor in exportados:
+            self.incrementar(nombre, valor, **dict(etiquetas))
+    
+    def lineas(self, openmetrics=True):
+        """Familias de contadores en OpenMetrics o en el formato de texto 0.0.4 de Prometheus"""
+        with self._lock:
+            contadores = dict(self._contadores)
+        lineas = []
+        for nombre, ayuda in METRICAS_CONTADORES.items():
+            # OpenMetrics nombra la familia sin _total; el formato 0.0.4 con el nombre de la muestra
+            familia = f"salvum_{nombre}" if openmetrics else f"salvum_{nombre}_total"
+            lineas.append(f"# TYPE {familia} counter")
+            lineas.append(f"# HELP {familia} {ayuda}")
+            for (clave, etiquetas), valor in sorted(contadores.items()):
+                if clave == nombre:
+                    lineas.append(f"salvum_{nombre}_total{_etiquetas_openmetrics(etiquetas)} {valor}")
+        return lineas
+
+class _ManejadorMetricas(BaseHTTPRequestHandler):
+    """GET /metrics con el texto que arma el automatizador"""
+    generar_texto = None
+    
+    def do_GET(self):
+        # OpenMetrics solo si el cliente lo pide; si no, el formato de texto 0.0.4
+        openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+        cuerpo = self.generar_texto(openmetrics).encode('utf-8')
+        self.send_response(200)
+        if openmetrics:
+            self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8')
+        else:
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+    
+    def log_message(self, formato, *args):
+        pass
+
+# 📸 CAPTURAS DE PANTALLA
+# nunca: no se captura | fallos: se retienen en memoria y se escriben solo si el cliente falla
+# cada_paso: se escriben todas. Las capturas de error se escriben siempre (salvo 'nunca').
+POLITICAS_CAPTURAS = ['nunca', 'fallos', 'cada_paso']
+DIRECTORIO_CAPTURAS = 'capturas'
+
+class GestorCapturas:
+    """Capturas sin bloquear el driver: reducción, re-encode y escritura en un hilo aparte"""
+    
+    def __init__(self, politica='fallos', ancho_max=960, calidad=70, max_mb=50, max_en_memoria=8):
+        self.politica = politica if politica in POLITICAS_CAPTURAS else 'fallos'
+        self.ancho_max = ancho_max
+        self.calidad = calidad
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_en_memoria = max_en_memoria
+        if Image is None:
+            self.extension = 'png'
+        else:
+            Image.init()
+            self.extension = 'webp' if 'WEBP' in Image.SAVE else 'jpg'
+        # Mismo directorio para el proceso principal y sus workers (heredan el entorno)
+        id_ejecucion = os.environ.setdefault('SALVUM_ID_EJECUCION', datetime.now().strftime('%Y%m%d_%H%M%S'))
+        self.directorio = os.path.join(DIRECTORIO_CAPTURAS, id_ejecucion)
+        self._retenidas = []
+        self._secuencia = 0
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._aviso_limite = False
+    
+    def capturar(self, driver, nombre, error=False):
+        """Tomar una captura. Devuelve la ruta destino si se va a escribir, None si queda retenida"""
+        if self.politica == 'nunca' or driver is None:
+            return None
+        try:
+            png = driver.get_screenshot_as_png()
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo capturar pantalla ({nombre}): {e}")
+            return None
+        
+        self._secuencia += 1
+        nombre = f"{self._secuencia:04d}_{datetime.now().strftime('%H%M%S')}_{nombre}"
+        
+        if error:
+            self.volcar()
+        elif self.politica == 'fallos':
+            self._retenidas = (self._retenidas + [(nombre, png)])[-self.max_en_memoria:]
+            return None
+        
+        return self._encolar(nombre, png)
+    
+    def volcar(self):
+        """El cliente falló: escribir lo retenido"""
+        retenidas, self._retenidas = self._retenidas, []
+        for nombre, png in retenidas:
+            self._encolar(nombre, png)
+    
+    def descartar(self):
+        """El cliente terminó bien (o empieza otro): olvidar lo retenido"""
+        self._retenidas = []
+    
+    def _encolar(self, nombre, png):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._procesar_cola, name='capturas', daemon=True)
+            self._hilo.start()
+        self._cola.put((nombre, png))
+        return os.path.join(self.directorio, f"{nombre}.{self.extension}")
+    
+    def _procesar_cola(self):
+        while True:
+            item = self._cola.get()
+            try:
+                if item is None:
+                    return
+                self._escribir(*item)
+            except Exception as e:
+                logger.warning(f"⚠️ Error guardando captura: {e}")
+            finally:
+                self._cola.task_done()
+    
+    def _reencodar(self, png):
+        """Reducir a ancho_max y pasar a WebP (o JPEG si Pillow no trae WebP)"""
+        if Image is None:
+            return png
+        imagen = Image.open(io.BytesIO(png))
+        imagen.thumbnail((self.ancho_max, self.ancho_max * 10))
+        salida = io.BytesIO()
+        if self.extension == 'webp':
+            imagen.save(salida, 'WEBP', quality=self.calidad)
+        else:
+            imagen.convert('RGB').save(salida, 'JPEG', quality=self.calidad, optimize=True)
+        return salida.getvalue()
+    
+    def _tamano_directorio(self):
+        try:
+            return sum(entrada.stat().st_size for entrada in os.scandir(self.directorio) if entrada.is_file())
+        except OSError:
+            return 0
+    
+    def _escribir(self, nombre, png):
+        datos = self._reencodar(png)
+        os.makedirs(self.directorio, exist_ok=True)
+        # El tope se mide en disco para que valga también entre workers
+        if self._tamano_directorio() + len(datos) > self.max_bytes:
+            if not self._aviso_limite:
+                logger.warning(f"⚠️ Capturas: tope de {self.max_bytes // (1024 * 1024)} MB alcanzado, se omiten las siguientes")
+                self._aviso_limite = True
+            return
+        ruta = os.path.join(self.directorio, f"{nombre}.{self.extension}")
+        with open(ruta, 'wb') as f:
+            f.write(datos)
+        logger.info(f"📸 Captura guardada: {ruta} ({len(datos) // 1024} KB)")
+    
+    def cerrar(self, timeout=30):
+        """Esperar a que se escriba lo encolado"""
+        if self._hilo is None:
+            return
+        self._cola.put(None)
+        self._hilo.join(timeout)
+        self._hilo = None
+
+# 🔎 CONSULTA DE PÁGINA EN UN SOLO ROUND TRIP: todos los selects e inputs con lo que las estrategias necesitan
+SCRIPT_CONSULTA_PAGINA = """
+    var etiqueta = function (el) {
+        var componente = el.closest('form-select, form-money-amount');
+        if (componente && componente.getAttribute('label')) { return componente.getAttribute('label'); }
+        var label = el.id && document.querySelector('label[for="' + el.id + '"]');
+        return label ? label.textContent.trim() : null;
+    };
+    var selects = Array.prototype.map.call(document.querySelectorAll('select'), function (el, posicion) {
+        return {
+            posicion: posicion, id: el.id || null, name: el.name || null, clases: el.className || '',
+            label: etiqueta(el), visible: el.offsetParent !== null, habilitado: !el.disabled,
+            seleccionada: el.selectedIndex,
+            opciones: Array.prototype.map.call(el.options, function (o) {
+                return {texto: o.text.trim(), valor: o.value, deshabilitada: o.disabled};
+            })
+        };
+    });
+    var inputs = Array.prototype.map.call(document.querySelectorAll('input'), function (el, posicion) {
+        return {
+            posicion: posicion, id: el.id || null, name: el.name || null, type: el.type, clases: el.className || '',
+            label: etiqueta(el), visible: el.offsetParent !== null, habilitado: !el.disabled,
+            value: el.type === 'password' ? '' : el.value
+        };
+    });
+    return {selects: selects, inputs: inputs};
+"""
+
+# Elegir una opción de document.querySelectorAll('select')[posicion] por texto, valor o índice y avisar a Angular
+SCRIPT_SELECCIONAR_OPCION = """
+    var select = document.querySelectorAll('select')[arguments[0]], criterio = arguments[1];
+    if (!select) { return null; }
+    var indice = -1;
+    if (criterio.indice !== null && criterio.indice !== undefined) {
+        indice = criterio.indice < 0 ? select.options.length + criterio.indice : criterio.indice;
+    } else {
+        for (var i = 0; i < select.options.length; i++) {
+            var opcion = select.options[i];
+            if (opcion.disabled) { continue; }
+            if ((criterio.texto !== null && opcion.text.trim() === criterio.texto) ||
+                (criterio.valor !== null && opcion.value === criterio.valor)) { indice = i; break; }
+        }
+    }
+    if (indice < 0 || indice >= select.options.length) { return null; }
+    select.focus();
+    select.selectedIndex = indice;
+    select.dispatchEvent(new Event('input', {bubbles: true}));
+    select.dispatchEvent(new Event('change', {bubbles: true}));
+    select.blur();
+    return select.options[indice].text.trim();
+"""
+
+# Mensajes explícitos de validación/rechazo visibles en el portal. Un campo inválido sin mensaje no
+# cuenta: puede ser un tipeo que quedó a medias por un error transitorio.
+SCRIPT_ERRORES_PORTAL = """
+    var visible = function (el) { return el.offsetParent !== null; };
+    return Array.prototype.filter.call(document.querySelectorAll(
+        "mat-error, .invalid-feedback, .error-message, .alert-danger, .toast-error, [role='alert']"
+    ), visible).map(function (el) { return el.textContent.trim(); }).filter(function (texto) {
+        return texto;
+    }).slice(0, 5);
+"""
+
+# 🧾 BITÁCORA DOM: instantánea compacta por transición de página, en memoria hasta que algo falla
+SCRIPT_INSTANTANEA_DOM = """
+    var incluirHtml = arguments[0];
+    var campos = Array.prototype.map.call(document.querySelectorAll('input, select, textarea'), function (el) {
+        var campo = {tag: el.tagName.toLowerCase(), id: el.id || null, name: el.name || null,
+                     clases: el.className || null, visible: el.offsetParent !== null};
+        if (el.tagName === 'SELECT') {
+            campo.opciones = Array.prototype.map.call(el.options, function (o) { return o.text.trim(); });
+            campo.seleccionada = el.selectedIndex;
+        } else {
+            campo.type = el.type;
+            // Datos del cliente (RUT, correo, teléfono...) enmascarados: solo queda el formato del valor
+            campo.value = el.type === 'password' ? (el.value ? '***' : '') :
+                el.value.replace(/[0-9]/g, '#').replace(/[^#. ,@:/-]/g, 'x');
+        }
+        return campo;
+    });
+    return {
+        url: location.href,
+        titulo: document.title,
+        campos: campos,
+        form_selects: Array.prototype.map.call(document.querySelectorAll('form-select'), function (fs) {
+            return fs.getAttribute('label');
+        }),
+        html: incluirHtml ? document.documentElement.outerHTML : null
+    };
+"""
+
+class BitacoraDom:
+    """Ring buffer de instantáneas DOM; se escribe un único .json.gz solo si el cliente falla"""
+    
+    def __init__(self, capacidad=12):
+        self._instantaneas = deque(maxlen=capacidad)
+    
+    def registrar(self, motivo, instantanea):
+        html = instantanea.pop('html', None)
+        instantanea['motivo'] = motivo
+        instantanea['ts'] = datetime.now().isoformat()
+        # El HTML se guarda comprimido: es lo único pesado de la instantánea
+        instantanea['html_gz'] = gzip.compress(html.encode('utf-8')) if html else None
+        self._instantaneas.append(instantanea)
+    
+    def ultima(self):
+        return self._instantaneas[-1] if self._instantaneas else None
+    
+    def descartar(self):
+        self._instantaneas.clear()
+    
+    def volcar(self, directorio, nombre):
+        """Escribir el buffer como un solo bundle comprimido y vaciarlo"""
+        if not self._instantaneas:
+            return None
+        instantaneas = []
+        for instantanea in self._instantaneas:
+            copia = dict(instantanea)
+            html_gz = copia.pop('html_gz')
+            copia['html'] = gzip.decompress(html_gz).decode('utf-8') if html_gz else None
+            instantaneas.append(copia)
+        self._instantaneas.clear()
+        
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, f"dom_{nombre}_{datetime.now().strftime('%H%M%S')}.json.gz")
+        with gzip.open(ruta, 'wt', encoding='utf-8') as f:
+            json.dump(instantaneas, f, ensure_ascii=False)
+        return ruta
+
+class BufferEscrituraPlanillas:
+    """Buffer write-behind: junta las actualizaciones de estado por planilla y las envía en un solo batch_update"""
+    
+    def __init__(self, obtener_hoja, intervalo_seg=20, max_pendientes=30, archivo_respaldo=ARCHIVO_ESCRITURAS_PENDIENTES,
+                 invalidar_hoja=None, metricas=None):
+        self._obtener_hoja = obtener_hoja
+        self._invalidar_hoja = invalidar_hoja
+        self.metricas = metricas or MetricasSalvum()
+        self.intervalo_seg = intervalo_seg
+        self.max_pendientes = max_pendientes
+        self.archivo_respaldo = archivo_respaldo
+        self._pendientes = {}  # sheet_id -> {(fila, columna): valor}
+        self._en_vuelo = {}  # lote que un flush está enviando (también va al respaldo)
+        self._lock = threading.RLock()
+        self._lock_envio = threading.Lock()
+        self._timer = None
+        self._cerrado = False
+    
+    def agregar(self, sheet_id, fila, columna, valor):
+        """Encolar una celda; la última escritura a la misma celda reemplaza a las anteriores.
+        
+        La cola se respalda en disco en cada encolado: un SIGKILL u OOM no pierde lo pendiente.
+        """
+        with self._lock:
+            self._pendientes.setdefault(sheet_id, {})[(fila, columna)] = valor
+            self._guardar_respaldo()
+            total = self.total_pendientes()
+        
+        if total >= self.max_pendientes:
+            self.flush(f"umbral de {self.max_pendientes} celdas")
+    
+    def total_pendientes(self):
+        with self._lock:
+            return sum(len(celdas) for celdas in self._pendientes.values())
+    
+    def flush(self, motivo="manual"):
+        """Enviar todo lo pendiente: un batch_update por planilla. Lo que falla vuelve a la cola.
+        
+        El lote se toma bajo el lock y se envía fuera de él, para que agregar() no espere a Sheets;
+        _lock_envio solo serializa los flush entre sí.
+        """
+        with self._lock_envio:
+            with self._lock:
+                if not self._pendientes:
+                    return True
+                lote = self._pendientes
+                self._pendientes = {}
+                self._en_vuelo = lote
+            
+            logger.info(f"📤 Enviando {sum(len(c) for c in lote.values())} celdas a {len(lote)} planilla(s) ({motivo})")
+            
+            fallidas = {}
+            for sheet_id, celdas in lote.items():
+                try:
+                    worksheet = self._obtener_hoja(sheet_id)
+                    datos = [
+                        {'range': rowcol_to_a1(fila, columna), 'values': [[valor]]}
+                        for (fila, columna), valor in sorted(celdas.items())
+                    ]
+                    self.metricas.llamada_sheets('batch_update', worksheet.batch_update, datos, value_input_option='USER_ENTERED')
+                    logger.info(f"✅ Planilla ...{sheet_id[-8:]}: {len(datos)} celdas actualizadas en un batch")
+                except Exception as e:
+                    logger.error(f"❌ Error en batch_update de ...{sheet_id[-8:]}: {e}")
+                    if self._invalidar_hoja and _error_sugiere_hoja_renombrada(e):
+                        self._invalidar_hoja(sheet_id)
+                    fallidas[sheet_id] = celdas
+            
+            with self._lock:
+                # Reencolar sin pisar valores más nuevos que hayan llegado entre medio
+                for sheet_id, celdas in fallidas.items():
+                    nuevos = self._pendientes.setdefault(sheet_id, {})
+                    for celda, valor in celdas.items():
+                        nuevos.setdefault(celda, valor)
+                self._en_vuelo = {}
+                if self.total_pendientes():
+                    self._guardar_respaldo()
+                else:
+                    self._borrar_respaldo()
+            
+            return not fallidas
+    
+    def iniciar(self):
+        """Arrancar el flush periódico en segundo plano"""
+        with self._lock:
+            if self._cerrado or self.intervalo_seg <= 0:
+                return
+            self._timer = threading.Timer(self.intervalo_seg, self._flush_periodico)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _flush_periodico(self):
+        try:
+            self.flush("timer")
+        except Exception as e:
+            logger.error(f"❌ Error en flush periódico: {e}")
+        finally:
+            self.iniciar()
+    
+    def cerrar(self):
+        """Detener el timer y enviar lo pendiente; si no se puede, queda respaldado en disco"""
+        with self._lock:
+            if self._cerrado:
+                return
+            self._cerrado = True
+            if self._timer:
+                self._timer.cancel()
+        
+        if not self.flush("cierre"):
+            logger.error(f"❌ Quedaron {self.total_pendientes()} celdas sin enviar, respaldadas en {self.archivo_respaldo}")
+    
+    def _guardar_respaldo(self):
+        """Pendientes + lote en vuelo a disco (se llama con el lock tomado; rename atómico)"""
+        try:
+            celdas_por_hoja = {}
+            for origen in (self._en_vuelo, self._pendientes):  # lo pendiente es más nuevo: pisa al lote
+                for sheet_id, celdas in origen.items():
+                    celdas_por_hoja.setdefault(sheet_id, {}).update(celdas)
+            respaldo = {
+                sheet_id: [[fila, columna, valor] for (fila, columna), valor in celdas.items()]
+                for sheet_id, celdas in celdas_por_hoja.items() if celdas
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(self.archivo_respaldo)), exist_ok=True)
+            temporal = self.archivo_respaldo + '.tmp'
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(respaldo, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.archivo_respaldo)
+        except Exception as e:
+            logger.error(f"❌ No se pudo respaldar escrituras pendientes: {e}")
+    
+    def _borrar_respaldo(self):
+        if os.path.exists(self.archivo_respaldo):
+            try:
+                os.remove(self.archivo_respaldo)
+            except OSError:
+                pass
+    
+    def recuperar_respaldos(self, patron):
+        """Cargar escrituras que quedaron sin enviar en una ejecución anterior"""
+        recuperadas = 0
+        for archivo in glob.glob(patron):
+            try:
+                with open(archivo, 'r', encoding='utf-8') as f:
+                    respaldo = json.load(f)
+                with self._lock:
+                    for sheet_id, celdas in respaldo.items():
+                        destino = self._pendientes.setdefault(sheet_id, {})
+                        for fila, columna, valor in celdas:
+                            destino.setdefault((fila, columna), valor)
+                            recuperadas += 1
+                if archivo != self.archivo_respaldo:
+                    os.remove(archivo)
+            except Exception as e:
+                logger.error(f"❌ Error recuperando {archivo}: {e}")
+        
+        if recuperadas:
+            logger.warning(f"♻️ {recuperadas} escrituras pendientes recuperadas de una ejecución anterior")
+            self.flush("recuperación")
+        return recuperadas
+
 class SalvumAutomacionCorregida:
     def __init__(self):
         self.driver = None
-        self.wait = None
         self.gc = None
+        self.config = {}
         self.agentes_config = []
         self.clientes_procesados = []
         self.clientes_fallidos = []
+        self.worker_id = None
+        self.workers_usados = 1
+        self.buffer_planillas = None
+        self._cache_hojas = {}
+        self._lock_cache_hojas = threading.Lock()
+        self._puntos_control = None
+        self._lock_puntos_control = threading.Lock()
+        self._perfil_ritmo = None
+        self.tiempo_espera_humana = 0.0
+        self.inicio_procesamiento = None
+        self.estadisticas_selectores = EstadisticasSelectores()
+        self.resolucion_driver = {}
+        self.diario = DiarioClientes()
+        self.clientes_reanudados = 0
+        self.clientes_duplicados = 0
+        self.tiempos_pasos = {}  # paso -> [segundos] de toda la ejecución
+        self.metricas = MetricasSalvum()
+        self._servidor_metricas = None
+        self._capturas = None
+        self.bitacora_dom = BitacoraDom()
+        self.estadisticas_red = {'solicitudes': 0, 'bytes': 0, 'bloqueables': 0, 'bytes_bloqueables': 0,
+                                 'bloqueadas': 0, 'bloqueadas_por_tipo': {}, 'bytes_por_tipo': {}}
+        self._solicitudes_red = {}  # requestId -> (url, tipo) en vuelo
+        self._tiempos_cliente = {}
+        self._limite_paso = None  # deadline (monotónico) del paso del flujo en curso
+        self._cifrador_cache = (None, None)  # (huella del material, Fernet): PBKDF2 es caro, se deriva una vez
+        self._progreso_paso = {}  # clicks ya hechos en el paso en curso ('accion', 'avanzado'): no se repiten al reintentar
+        self._flujo_reanudado = False
+        self.reintentos_pasos = {}  # paso -> reintentos por error transitorio
+        self.sesion_iniciada = False
+        self.relogins = 0
+        self.estadisticas_busqueda = {'total': 0, 'fallidas': 0, 'segundos': 0.0, 'segundos_fallidas': 0.0}
         
     def verificar_conexion_vps(self):
         """Verificar que estamos conectados correctamente al VPS Chile"""
@@ -136,6 +1264,7 @@ class SalvumAutomacionCorregida:
                 with open('config.json', 'r', encoding='utf-8') as f:
                     config = json.load(f)
                 
+                self.config = config
                 agentes_activos = [
                     agente for agente in config.get('agentes', []) 
                     if agente.get('activo', True)
@@ -169,6 +1298,25 @@ class SalvumAutomacionCorregida:
             logger.error(f"❌ Error cargando configuración: {e}")
             return False
     
+    def _leer_opcion(self, clave, variable_entorno, por_defecto):
+        """Leer opción desde variable de entorno o config.json (la variable de entorno manda)"""
+        valor = os.getenv(variable_entorno)
+        if valor is None or not valor.strip():
+            return self.config.get(clave, por_defecto)
+        
+        valor = valor.strip()
+        try:
+            if isinstance(por_defecto, bool):
+                return valor.lower() in ('1', 'true', 'si', 'sí', 'yes')
+            if isinstance(por_defecto, int):
+                return int(valor)
+            if isinstance(por_defecto, float):
+                return float(valor)
+        except ValueError:
+            logger.warning(f"⚠️ Valor inválido en {variable_entorno}='{valor}', usando {por_defecto}")
+            return por_defecto
+        return valor
+    
     def configurar_google_sheets(self):
         """Configurar conexión con Google Sheets"""
         logger.info("📊 Configurando Google Sheets...")
@@ -188,6 +1336,23 @@ class SalvumAutomacionCorregida:
             
             self.gc = gspread.authorize(scoped_creds)
             
+            archivo_respaldo = ARCHIVO_ESCRITURAS_PENDIENTES
+            if self.worker_id is not None:
+                archivo_respaldo = ARCHIVO_ESCRITURAS_PENDIENTES.replace('.json', f'_worker{self.worker_id}.json')
+            
+            self.buffer_planillas = BufferEscrituraPlanillas(
+                self._obtener_hoja,
+                intervalo_seg=self._leer_opcion('escritura_intervalo_seg', 'SALVUM_ESCRITURA_INTERVALO', 20),
+                max_pendientes=self._leer_opcion('escritura_max_pendientes', 'SALVUM_ESCRITURA_MAX', 30),
+                archivo_respaldo=archivo_respaldo,
+                invalidar_hoja=self._invalidar_hoja,
+                metricas=self.metricas
+            )
+            if self.worker_id is None:
+                self.buffer_planillas.recuperar_respaldos(ARCHIVO_ESCRITURAS_PENDIENTES.replace('.json', '*.json'))
+            self.buffer_planillas.iniciar()
+            atexit.register(self.buffer_planillas.cerrar)
+            
             logger.info("✅ Google Sheets configurado")
             return True
             
@@ -200,52 +1365,29 @@ class SalvumAutomacionCorregida:
         logger.info(f"📖 Leyendo clientes de {nombre_agente}...")
         
         try:
-            spreadsheet = self.gc.open_by_key(sheet_id)
-            
-            worksheet = None
-            nombres_hoja_posibles = [
-                'Mis_Clientes_Financiamiento',
-                'sheet1', 'Hoja1', 'Sheet1'
-            ]
-            
-            for nombre_hoja in nombres_hoja_posibles:
-                try:
-                    worksheet = spreadsheet.worksheet(nombre_hoja)
-                    logger.info(f"✅ Hoja encontrada: '{nombre_hoja}'")
-                    break
-                except:
-                    continue
-            
-            if not worksheet:
-                worksheet = spreadsheet.sheet1
-                logger.info("⚠️ Usando primera hoja disponible")
-            
-            records = worksheet.get_all_records()
+            try:
+                headers_reales, indice, records = self._leer_registros_proyectados(sheet_id)
+            except Exception as e:
+                if not _error_sugiere_hoja_renombrada(e):
+                    raise
+                self._invalidar_hoja(sheet_id)
+                headers_reales, indice, records = self._leer_registros_proyectados(sheet_id)
             logger.info(f"📊 Total registros en planilla: {len(records)}")
             
             if not records:
                 logger.warning(f"⚠️ {nombre_agente}: Planilla vacía")
                 return []
             
-            headers_reales = list(records[0].keys())
             logger.info(f"📋 Headers encontrados: {headers_reales}")
+            logger.info(f"🧭 Índice de columnas: {indice}")
             
-            # Verificar columnas críticas con manejo de acentos
-            tiene_procesar = any('PROCESAR' in h.upper() for h in headers_reales)
-            tiene_renta = any(
-                ('RENTA' in h.upper() and 'LIQUIDA' in h.upper()) or
-                ('RENTA' in h.upper() and 'LÍQUIDA' in h.upper())
-                for h in headers_reales
-            )
-            tiene_nombre = any('NOMBRE' in h.upper() and 'CLIENTE' in h.upper() for h in headers_reales)
-            
-            if not tiene_procesar:
+            if 'procesar' not in indice:
                 logger.error(f"❌ {nombre_agente}: Falta columna PROCESAR")
                 return []
-            if not tiene_renta:
+            if 'renta_liquida' not in indice:
                 logger.error(f"❌ {nombre_agente}: Falta columna RENTA LIQUIDA/LÍQUIDA")
                 return []
-            if not tiene_nombre:
+            if 'nombre_cliente' not in indice:
                 logger.error(f"❌ {nombre_agente}: Falta columna Nombre Cliente")
                 return []
             
@@ -254,14 +1396,9 @@ class SalvumAutomacionCorregida:
             
             clientes_procesar = []
             
-            for i, record in enumerate(records, start=2):
-                # Buscar renta con diferentes variantes
-                renta_liquida = (record.get('RENTA LIQUIDA', 0) or 
-                               record.get('RENTA LÍQUIDA', 0) or
-                               record.get('Renta Liquida', 0) or
-                               record.get('Renta Líquida', 0))
-                
-                procesar = str(record.get('PROCESAR', '')).upper().strip()
+            for i, record in records:
+                renta_liquida = record.get('renta_liquida', 0)
+                procesar = str(record.get('procesar', '')).upper().strip()
                 
                 try:
                     if isinstance(renta_liquida, str):
@@ -276,8 +1413,8 @@ class SalvumAutomacionCorregida:
                 
                 if renta_liquida > 0 and procesar in ESTADOS_VALIDOS_PROCESAR:
                     
-                    nombre_cliente = record.get('Nombre Cliente', '')
-                    rut_cliente = record.get('RUT', '')
+                    nombre_cliente = str(record.get('nombre_cliente', ''))
+                    rut_cliente = str(record.get('rut', ''))
                     
                     if not nombre_cliente.strip():
                         logger.warning(f"⚠️ Fila {i}: Nombre cliente vacío")
@@ -287,7 +1424,7 @@ class SalvumAutomacionCorregida:
                         logger.warning(f"⚠️ Fila {i}: RUT vacío")
                         continue
                     
-                    monto_financiar = self._limpiar_numero(record.get('Monto Financiamiento', 0))
+                    monto_financiar = self._limpiar_numero(record.get('monto_financiamiento', 0))
                     
                     if monto_financiar <= 0:
                         logger.warning(f"⚠️ Fila {i}: Monto inválido: {monto_financiar}")
@@ -299,13 +1436,13 @@ class SalvumAutomacionCorregida:
                         'row_number': i,
                         'Nombre Cliente': nombre_cliente,
                         'RUT': rut_cliente,
-                        'Email': record.get('Email', ''),
-                        'Telefono': record.get('Teléfono', record.get('Telefono', '')),
+                        'Email': record.get('email', ''),
+                        'Telefono': record.get('telefono', ''),
                         'Monto Financiar Original': monto_financiar,
                         'RENTA LIQUIDA': renta_liquida,
-                        'Modelo Casa': record.get('Modelo Casa', ''),
-                        'Precio Casa': self._limpiar_numero(record.get('Precio Casa', 0)),
-                        'Origen': record.get('Origen', ''),
+                        'Modelo Casa': record.get('modelo_casa', ''),
+                        'Precio Casa': self._limpiar_numero(record.get('precio_casa', 0)),
+                        'Origen': record.get('origen', ''),
                         'Estado Original': procesar
                     }
                     clientes_procesar.append(cliente)
@@ -322,6 +1459,220 @@ class SalvumAutomacionCorregida:
             logger.error(f"📋 Traceback: {traceback.format_exc()}")
             return []
     
+    def _indice_columnas(self, sheet_id):
+        """Encabezados e índice de columnas de la hoja, resueltos una sola vez por ejecución.
+        
+        Devuelve (worksheet, encabezados, indice) con indice = {campo lógico: número de columna}.
+        """
+        worksheet = self._obtener_hoja(sheet_id)
+        
+        with self._lock_cache_hojas:
+            entrada = self._cache_hojas.get(sheet_id, {})
+            if 'indice_columnas' in entrada:
+                return worksheet, entrada['encabezados'], entrada['indice_columnas']
+        
+        encabezados = self.metricas.llamada_sheets('row_values', worksheet.row_values, 1)
+        indice = _resolver_columnas(encabezados)
+        
+        with self._lock_cache_hojas:
+            if sheet_id in self._cache_hojas:
+                self._cache_hojas[sheet_id]['encabezados'] = encabezados
+                self._cache_hojas[sheet_id]['indice_columnas'] = indice
+        
+        return worksheet, encabezados, indice
+    
+    def _leer_registros_proyectados(self, sheet_id):
+        """Descargar solo las columnas de CAMPOS_LECTURA con un único batch_get.
+        
+        Devuelve (encabezados, indice, registros) con registros como lista de (fila, dict),
+        cada dict indexado por campo lógico y limitado a las columnas proyectadas.
+        En modo incremental solo se piden las filas nuevas o aún abiertas.
+        """
+        worksheet, encabezados, indice = self._indice_columnas(sheet_id)
+        
+        columnas = [(indice[campo], campo) for campo in CAMPOS_LECTURA if campo in indice]
+        if not columnas:
+            return encabezados, indice, []
+        
+        incremental = self._leer_opcion('lectura_incremental', 'SALVUM_LECTURA_INCREMENTAL', False)
+        punto_control = None
+        bloques = [(2, None)]
+        
+        if incremental:
+            punto_control = self._punto_control_vigente(sheet_id, worksheet.title, encabezados)
+            if punto_control:
+                bloques = self._bloques_incrementales(punto_control)
+        
+        try:
+            filas = self._descargar_bloques(worksheet, columnas, bloques)
+        except Exception as e:
+            if not punto_control:
+                raise
+            # Que una lectura incremental fallida no deje la planilla sin leer (y el checkpoint sin avanzar)
+            logger.warning(f"⚠️ Lectura incremental falló ({e}) - escaneo completo")
+            punto_control = None
+            filas = self._descargar_bloques(worksheet, columnas, [(2, None)])
+        logger.info(f"📦 Proyección: {len(columnas)} de {len(encabezados)} columnas, {len(filas)} filas descargadas")
+        
+        if punto_control and not self._marca_agua_intacta(punto_control, filas):
+            logger.warning("⚠️ La fila de la marca de agua cambió (filas insertadas/eliminadas) - escaneo completo")
+            punto_control = None
+            filas = self._descargar_bloques(worksheet, columnas, [(2, None)])
+        
+        if incremental:
+            self._guardar_punto_control(sheet_id, worksheet.title, encabezados, filas, punto_control)
+        
+        return encabezados, indice, sorted(filas.items())
+    
+    def _descargar_bloques(self, worksheet, columnas, bloques):
+        """Un batch_get con un rango por columna y bloque de filas. Devuelve {fila: registro}"""
+        rangos = []
+        for inicio, fin in bloques:
+            for numero, _ in columnas:
+                letra = rowcol_to_a1(1, numero).rstrip('0123456789')
+                rangos.append(f"{letra}{inicio}:{letra}{fin if fin else ''}")
+        
+        valores_por_rango = self.metricas.llamada_sheets('batch_get', worksheet.batch_get, rangos, major_dimension='COLUMNS')
+        
+        filas = {}
+        posicion = 0
+        for inicio, fin in bloques:
+            columnas_valores = []
+            for _, campo in columnas:
+                rango_valores = valores_por_rango[posicion]
+                posicion += 1
+                valores = rango_valores[0] if rango_valores else []
+                columnas_valores.append((campo, numericise_all(valores, default_blank="")))
+            
+            total = max((len(valores) for _, valores in columnas_valores), default=0)
+            if fin:
+                total = max(total, fin - inicio + 1)
+            
+            for desplazamiento in range(total):
+                filas[inicio + desplazamiento] = {
+                    campo: valores[desplazamiento] if desplazamiento < len(valores) else ""
+                    for campo, valores in columnas_valores
+                }
+        
+        return filas
+    
+    # ---------- Lectura incremental (marca de agua por planilla) ----------
+    
+    def _hash_valores(self, valores):
+        return hashlib.sha1(json.dumps(valores, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8')).hexdigest()
+    
+    def _firma_fila(self, registro):
+        """Identidad de la fila (no cambia cuando escribimos el estado)"""
+        return self._hash_valores([registro.get('nombre_cliente', ''), registro.get('rut', '')])
+    
+    def _cargar_puntos_control(self):
+        with self._lock_puntos_control:
+            if self._puntos_control is None:
+                self._puntos_control = {}
+                if os.path.exists(ARCHIVO_PUNTOS_CONTROL):
+                    try:
+                        with open(ARCHIVO_PUNTOS_CONTROL, 'r', encoding='utf-8') as f:
+                            self._puntos_control = json.load(f)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Checkpoint de planillas ilegible, se hará escaneo completo: {e}")
+            return self._puntos_control
+    
+    def _punto_control_vigente(self, sheet_id, nombre_hoja, encabezados):
+        """Checkpoint utilizable o None si corresponde escaneo completo"""
+        punto_control = self._cargar_puntos_control().get(sheet_id)
+        
+        if not punto_control:
+            logger.info("📖 Sin checkpoint previo - escaneo completo")
+            return None
+        if punto_control.get('nombre_hoja') != nombre_hoja or \
+           punto_control.get('firma_encabezados') != self._hash_valores(encabezados):
+            logger.warning("⚠️ La estructura de la hoja cambió - escaneo completo")
+            return None
+        
+        cada = self._leer_opcion('escaneo_completo_cada', 'SALVUM_ESCANEO_COMPLETO_CADA', 20)
+        if cada > 0 and punto_control.get('escaneos_incrementales', 0) >= cada:
+            logger.info(f"📖 {cada} escaneos incrementales seguidos - escaneo completo de control")
+            return None
+        
+        return punto_control
+    
+    def _bloques_incrementales(self, punto_control):
+        """Filas abiertas + fila de la marca de agua + todo lo que vino después"""
+        ultima_fila = punto_control['ultima_fila']
+        filas = sorted({int(fila) for fila in punto_control.get('pendientes', {})} | {ultima_fila})
+        filas = [fila for fila in filas if fila >= 2]
+        
+        bloques = []
+        for fila in filas:
+            if bloques and fila == bloques[-1][1] + 1:
+                bloques[-1] = (bloques[-1][0], fila)
+            else:
+                bloques.append((fila, fila))
+        
+        bloques.append((ultima_fila + 1, None))
+        
+        # Cada bloque es un rango por columna en la URL del batch_get: con muchas filas abiertas
+        # dispersas se pide un solo rango desde la primera
+        maximo = self._leer_opcion('max_bloques_incrementales', 'SALVUM_MAX_BLOQUES_INCREMENTALES', 20)
+        if len(bloques) > maximo:
+            logger.info(f"📖 {len(bloques)} bloques de filas abiertas (máximo {maximo}) - se lee desde la fila {bloques[0][0]}")
+            bloques = [(bloques[0][0], None)]
+        
+        logger.info(f"📖 Lectura incremental: {len(punto_control.get('pendientes', {}))} filas abiertas + filas desde la {ultima_fila + 1}")
+        return bloques
+    
+    def _marca_agua_intacta(self, punto_control, filas):
+        ultima_fila = punto_control['ultima_fila']
+        if ultima_fila < 2:
+            return True
+        registro = filas.get(ultima_fila)
+        return registro is not None and self._firma_fila(registro) == punto_control.get('firma_ultima')
+    
+    def _guardar_punto_control(self, sheet_id, nombre_hoja, encabezados, filas, punto_control_previo):
+        """Actualizar y persistir el checkpoint de la planilla después de una lectura"""
+        anteriores = (punto_control_previo or {}).get('pendientes', {})
+        
+        con_datos = {
+            fila: registro for fila, registro in filas.items()
+            if any(str(valor).strip() for valor in registro.values())
+        }
+        ultima_fila = max(con_datos, default=(punto_control_previo or {}).get('ultima_fila', 1))
+        
+        pendientes = {}
+        cambiadas = 0
+        for fila, registro in con_datos.items():
+            if str(registro.get('procesar', '')).upper().strip() in ESTADOS_TERMINALES:
+                continue
+            hash_fila = self._hash_valores(registro)
+            if str(fila) in anteriores and anteriores[str(fila)] != hash_fila:
+                cambiadas += 1
+            pendientes[str(fila)] = hash_fila
+        
+        if punto_control_previo:
+            logger.info(f"🔄 Filas abiertas modificadas desde la última lectura: {cambiadas}")
+        
+        punto_control = {
+            'nombre_hoja': nombre_hoja,
+            'firma_encabezados': self._hash_valores(encabezados),
+            'ultima_fila': ultima_fila,
+            'firma_ultima': self._firma_fila(con_datos[ultima_fila]) if ultima_fila in con_datos else None,
+            'pendientes': pendientes,
+            'escaneos_incrementales': (punto_control_previo.get('escaneos_incrementales', 0) + 1) if punto_control_previo else 0,
+            'actualizado': datetime.now().isoformat()
+        }
+        
+        puntos_control = self._cargar_puntos_control()
+        with self._lock_puntos_control:
+            puntos_control[sheet_id] = punto_control
+            try:
+                os.makedirs(DIRECTORIO_ESTADO, exist_ok=True)
+                temporal = ARCHIVO_PUNTOS_CONTROL + '.tmp'
+                with open(temporal, 'w', encoding='utf-8') as f:
+                    json.dump(puntos_control, f, indent=2, ensure_ascii=False)
+                os.replace(temporal, ARCHIVO_PUNTOS_CONTROL)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo guardar checkpoint de planillas: {e}")
+    
     def _limpiar_numero(self, valor):
         """Limpiar y convertir valores numéricos"""
         try:
@@ -332,62 +1683,388 @@ class SalvumAutomacionCorregida:
         except:
             return 0
     
+    def _leer_planilla_cronometrada(self, agente):
+        """Leer la planilla de un agente registrando cuánto tardó"""
+        inicio = time.monotonic()
+        clientes = self.leer_clientes_desde_planilla(agente['sheet_id'], agente['nombre'])
+        logger.info(f"⏱️ {agente['nombre']}: {len(clientes)} clientes leídos en {time.monotonic() - inicio:.2f}s")
+        return clientes
+    
     def leer_todos_los_clientes(self):
-        """Leer clientes de todas las planillas configuradas"""
+        """Leer clientes de todas las planillas configuradas (en paralelo, orden determinista)"""
         logger.info("🔍 Buscando clientes en todas las planillas...")
         
-        todos_los_clientes = []
-        
+        agentes_activos = []
         for agente in self.agentes_config:
             if not agente.get('activo', True):
                 logger.info(f"⏭️ Saltando {agente['nombre']} (inactivo)")
                 continue
+            agentes_activos.append(agente)
+        
+        todos_los_clientes = []
+        
+        if agentes_activos:
+            max_concurrentes = self._leer_opcion('max_lecturas_concurrentes', 'SALVUM_LECTURAS_CONCURRENTES', 4)
+            max_concurrentes = max(1, min(max_concurrentes, len(agentes_activos)))
+            logger.info(f"⚡ Leyendo {len(agentes_activos)} planillas (máx {max_concurrentes} simultáneas)")
+            
+            inicio = time.monotonic()
+            resultados = {}
+            
+            with ThreadPoolExecutor(max_workers=max_concurrentes, thread_name_prefix='lectura-planilla') as executor:
+                futuros = {
+                    executor.submit(self._leer_planilla_cronometrada, agente): posicion
+                    for posicion, agente in enumerate(agentes_activos)
+                }
+                for futuro in as_completed(futuros):
+                    posicion = futuros[futuro]
+                    try:
+                        resultados[posicion] = futuro.result()
+                    except Exception as e:
+                        logger.error(f"❌ Error leyendo planilla de {agentes_activos[posicion]['nombre']}: {e}")
+                        resultados[posicion] = []
             
-            clientes = self.leer_clientes_desde_planilla(
-                agente['sheet_id'], 
-                agente['nombre']
-            )
-            todos_los_clientes.extend(clientes)
+            # Mismo orden que config.json, sin importar cuál terminó primero
+            for posicion in range(len(agentes_activos)):
+                todos_los_clientes.extend(resultados[posicion])
+            
+            logger.info(f"⏱️ Lectura de todas las planillas: {time.monotonic() - inicio:.2f}s")
+        
+        todos_los_clientes = self._deduplicar_por_rut(todos_los_clientes)
         
         logger.info(f"🎯 TOTAL ENCONTRADO: {len(todos_los_clientes)} clientes para procesar")
         
         return todos_los_clientes
     
-    def actualizar_estado_cliente(self, cliente_data, estado, resultado=""):
-        """Actualizar estado del cliente en su planilla específica"""
-        try:
+    def _deduplicar_por_rut(self, clientes):
+        """Dejar una sola fila por RUT normalizado; las demás quedan DUPLICADO en su planilla"""
+        politica = self._leer_opcion('politica_duplicados', 'SALVUM_POLITICA_DUPLICADOS', 'primero')
+        if politica not in POLITICAS_DUPLICADOS:
+            logger.warning(f"⚠️ Política de duplicados desconocida '{politica}', se usa 'primero'")
+            politica = 'primero'
+        
+        indice = {}
+        for posicion, cliente in enumerate(clientes):
+            rut = _normalizar_rut(cliente['RUT'])
+            if rut:
+                indice.setdefault(rut, []).append(posicion)
+        
+        perdedores = set()
+        for rut, posiciones in indice.items():
+            if len(posiciones) < 2:
+                continue
+            if politica == 'ultimo':
+                ganador = posiciones[-1]
+            elif politica == 'mayor_monto':
+                ganador = max(posiciones, key=lambda p: (clientes[p]['Monto Financiar Original'], -p))
+            else:
+                ganador = posiciones[0]
+            
+            elegido = clientes[ganador]
+            for posicion in posiciones:
+                if posicion == ganador:
+                    continue
+                perdedores.add(posicion)
+                duplicado = clientes[posicion]
+                logger.warning(
+                    f"👯 RUT {duplicado['RUT']} repetido: {duplicado['agente']} fila {duplicado['row_number']} "
+                    f"→ DUPLICADO (se procesa {elegido['agente']} fila {elegido['row_number']})"
+                )
+                self.actualizar_estado_cliente(
+                    duplicado, "DUPLICADO",
+                    f"RUT repetido, se procesa en {elegido['agente']} fila {elegido['row_number']}"
+                )
+        
+        if perdedores:
+            self.clientes_duplicados += len(perdedores)
+            logger.info(f"👯 {len(perdedores)} filas duplicadas por RUT omitidas (política '{politica}')")
+        
+        return [cliente for posicion, cliente in enumerate(clientes) if posicion not in perdedores]
+    
+    def _obtener_hoja(self, sheet_id):
+        """Hoja de clientes de una planilla, resuelta una sola vez por ejecución y cacheada"""
+        with self._lock_cache_hojas:
+            entrada = self._cache_hojas.get(sheet_id)
+        if entrada:
+            return entrada['worksheet']
+        
+        spreadsheet = self.metricas.llamada_sheets('open_by_key', self.gc.open_by_key, sheet_id)
+        
+        # Una sola llamada para listar las pestañas en vez de probar nombres a ciegas
+        hojas_por_nombre = {ws.title: ws for ws in self.metricas.llamada_sheets('worksheets', spreadsheet.worksheets)}
+        
+        worksheet = None
+        for nombre_hoja in NOMBRES_HOJA_POSIBLES:
+            if nombre_hoja in hojas_por_nombre:
+                worksheet = hojas_por_nombre[nombre_hoja]
+                logger.info(f"✅ Hoja encontrada: '{nombre_hoja}'")
+                break
+        
+        if not worksheet:
+            worksheet = spreadsheet.sheet1
+            logger.info(f"⚠️ Usando primera hoja disponible: '{worksheet.title}'")
+        
+        with self._lock_cache_hojas:
+            self._cache_hojas[sheet_id] = {
+                'spreadsheet': spreadsheet,
+                'worksheet': worksheet,
+                'nombre_hoja': worksheet.title
+            }
+        
+        return worksheet
+    
+    def _invalidar_hoja(self, sheet_id):
+        """Olvidar la hoja cacheada (p.ej. si la pestaña fue renombrada)"""
+        with self._lock_cache_hojas:
+            entrada = self._cache_hojas.pop(sheet_id, None)
+        if entrada:
+            logger.warning(f"♻️ Cache de hoja invalidada para ...{sheet_id[-8:]} (era '{entrada['nombre_hoja']}')")
+    
+    def _columnas_estado(self, sheet_id):
+        """Columnas (estado, fecha de proceso, resultado) según el índice de encabezados.
+        
+        El estado se escribe en la propia columna PROCESAR; fecha y resultado usan su
+        encabezado si existe o, si no, las dos columnas siguientes a PROCESAR.
+        """
+        _, _, indice = self._indice_columnas(sheet_id)
+        
+        if 'procesar' not in indice:
+            raise Exception("La planilla no tiene columna PROCESAR")
+        
+        col_estado = indice['procesar']
+        col_fecha = indice.get('fecha_proceso', col_estado + 1)
+        col_resultado = indice.get('resultado', col_estado + 2)
+        return col_estado, col_fecha, col_resultado
+    
+    def actualizar_estado_cliente(self, cliente_data, estado, resultado=""):
+        """Encolar actualización de estado del cliente en su planilla (se envía en batch)"""
+        try:
             sheet_id = cliente_data['sheet_id']
             row_number = cliente_data['row_number']
             agente = cliente_data['agente']
             
-            spreadsheet = self.gc.open_by_key(sheet_id)
-            
-            worksheet = None
-            nombres_hoja_posibles = ['Mis_Clientes_Financiamiento', 'sheet1', 'Hoja1', 'Sheet1']
-            
-            for nombre_hoja in nombres_hoja_posibles:
-                try:
-                    worksheet = spreadsheet.worksheet(nombre_hoja)
-                    break
-                except:
-                    continue
-            
-            if not worksheet:
-                worksheet = spreadsheet.sheet1
+            col_estado, col_fecha, col_resultado = self._columnas_estado(sheet_id)
             
-            worksheet.update_cell(row_number, 13, estado)
+            self.buffer_planillas.agregar(sheet_id, row_number, col_estado, estado)
             
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            worksheet.update_cell(row_number, 14, f"Procesado: {timestamp}")
+            self.buffer_planillas.agregar(sheet_id, row_number, col_fecha, f"Procesado: {timestamp}")
             
             if resultado:
-                worksheet.update_cell(row_number, 15, resultado)
+                self.buffer_planillas.agregar(sheet_id, row_number, col_resultado, resultado)
             
-            logger.info(f"✅ {agente} - Estado actualizado en fila {row_number}: {estado}")
+            logger.info(f"✅ {agente} - Estado encolado para fila {row_number}: {estado}")
             
         except Exception as e:
             logger.error(f"❌ Error actualizando estado: {e}")
     
+    def _version_mayor(self, comando):
+        """Versión mayor reportada por '<comando> --version' (None si no se puede leer)"""
+        try:
+            salida = subprocess.run([comando, '--version'], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            return None
+        coincidencia = re.search(r'(\d+)\.\d+\.\d+', salida)
+        return int(coincidencia.group(1)) if coincidencia else None
+    
+    def _version_mayor_chrome(self):
+        for binario in BINARIOS_CHROME:
+            if shutil.which(binario):
+                version = self._version_mayor(binario)
+                if version:
+                    return version
+        return None
+    
+    def _ruta_chromedriver_cache(self, version_chrome):
+        nombre = 'chromedriver.exe' if os.name == 'nt' else 'chromedriver'
+        return os.path.join(DIRECTORIO_CHROMEDRIVER, str(version_chrome), nombre)
+    
+    def _resolver_chromedriver(self, version_chrome):
+        """Chromedriver local sin tocar la red: ruta explícita o cache por versión de Chrome.
+        
+        Devuelve (ruta, origen) o (None, None) si hay que delegar en Selenium Manager.
+        """
+        explicita = self._leer_opcion('chromedriver_path', 'CHROMEDRIVER_PATH', '')
+        if explicita:
+            if os.path.isfile(explicita):
+                return explicita, 'explicito'
+            logger.warning(f"⚠️ chromedriver_path no existe: {explicita}")
+        
+        if version_chrome:
+            cacheado = self._ruta_chromedriver_cache(version_chrome)
+            if os.path.isfile(cacheado) and self._version_mayor(cacheado) == version_chrome:
+                return cacheado, 'cache'
+        
+        return None, None
+    
+    def _cachear_chromedriver(self, ruta, version_chrome):
+        """Copiar el driver resuelto a la cache si coincide con la versión de Chrome"""
+        if not ruta or not version_chrome or not os.path.isfile(ruta):
+            return
+        destino = self._ruta_chromedriver_cache(version_chrome)
+        if os.path.abspath(ruta) == os.path.abspath(destino):
+            return
+        if self._version_mayor(ruta) != version_chrome:
+            logger.info(f"ℹ️ chromedriver {ruta} no coincide con Chrome {version_chrome}, no se cachea")
+            return
+        try:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            temporal = f"{destino}.{os.getpid()}.tmp"
+            shutil.copy2(ruta, temporal)
+            os.chmod(temporal, 0o755)
+            os.replace(temporal, destino)
+            logger.info(f"💾 chromedriver cacheado para Chrome {version_chrome}")
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo cachear chromedriver: {e}")
+    
+    def _iniciar_chrome(self, options):
+        """Resolver chromedriver (explícito → cache → Selenium Manager → webdriver-manager) e iniciar Chrome"""
+        inicio = time.monotonic()
+        version_chrome = self._version_mayor_chrome()
+        ruta, origen = self._resolver_chromedriver(version_chrome)
+        
+        if ruta:
+            segundos = time.monotonic() - inicio
+            self.driver = webdriver.Chrome(service=Service(ruta), options=options)
+        else:
+            try:
+                # Selenium Manager resuelve el driver dentro del arranque; el tiempo incluye abrir Chrome
+                self.driver = webdriver.Chrome(service=Service(), options=options)
+                origen = 'selenium-manager'
+            except Exception as e:
+                logger.warning(f"⚠️ Selenium Manager no pudo resolver chromedriver: {e}")
+                ruta = ChromeDriverManager().install()
+                origen = 'webdriver-manager'
+                self.driver = webdriver.Chrome(service=Service(ruta), options=options)
+            segundos = time.monotonic() - inicio
+            self._cachear_chromedriver(getattr(self.driver.service, 'path', None) or ruta, version_chrome)
+        
+        self.metricas.incrementar('navegador_inicios', origen=origen)
+        self.resolucion_driver = {
+            'origen': origen,
+            'version_chrome': version_chrome,
+            'segundos': round(segundos, 2),
+            'incluye_arranque': origen == 'selenium-manager'
+        }
+        logger.info(f"🚗 chromedriver vía {origen} en {segundos:.2f}s (Chrome {version_chrome or '?'})")
+    
+    def _modo_bloqueo_red(self):
+        modo = self._leer_opcion('bloqueo_red', 'SALVUM_BLOQUEO_RED', 'desactivado')
+        if modo not in MODOS_BLOQUEO_RED:
+            logger.warning(f"⚠️ Modo de bloqueo de red desconocido '{modo}', se desactiva")
+            return 'desactivado'
+        return modo
+    
+    def _patrones_bloqueo_red(self):
+        return PATRONES_BLOQUEO_RED + list(self.config.get('bloqueo_red_patrones', []))
+    
+    def _configurar_bloqueo_red(self):
+        """Activar el dominio Network por CDP y, en modo bloquear, la lista de URLs descartadas"""
+        modo = self._modo_bloqueo_red()
+        if modo == 'desactivado':
+            return
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            if modo == 'bloquear':
+                patrones = self._patrones_bloqueo_red()
+                self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patrones})
+                logger.info(f"🚫 Bloqueo de red activo: {len(patrones)} patrones")
+            else:
+                logger.info("📏 Bloqueo de red en modo medición (no se bloquea nada)")
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo configurar el bloqueo de red: {e}")
+    
+    def _recolectar_red(self):
+        """Procesar los eventos Network.* acumulados en el log de performance"""
+        if self._modo_bloqueo_red() == 'desactivado' or not self.driver:
+            return
+        try:
+            entradas = self.driver.get_log('performance')
+        except Exception:
+            return
+        
+        patrones = self._patrones_bloqueo_red()
+        estadisticas = self.estadisticas_red
+        for entrada in entradas:
+            try:
+                mensaje = json.loads(entrada['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            metodo = mensaje.get('method')
+            parametros = mensaje.get('params', {})
+            id_solicitud = parametros.get('requestId')
+            
+            if metodo == 'Network.requestWillBeSent':
+                self._solicitudes_red[id_solicitud] = (parametros['request']['url'], parametros.get('type', 'Other'))
+            elif metodo == 'Network.loadingFinished':
+                url, tipo = self._solicitudes_red.pop(id_solicitud, ('', 'Other'))
+                tamano = parametros.get('encodedDataLength', 0)
+                estadisticas['solicitudes'] += 1
+                estadisticas['bytes'] += tamano
+                if any(fnmatch.fnmatchcase(url, patron) for patron in patrones):
+                    estadisticas['bloqueables'] += 1
+                    estadisticas['bytes_bloqueables'] += tamano
+                    por_tipo = estadisticas['bytes_por_tipo'].setdefault(tipo, [0, 0])
+                    por_tipo[0] += tamano
+                    por_tipo[1] += 1
+            elif metodo == 'Network.loadingFailed':
+                _, tipo = self._solicitudes_red.pop(id_solicitud, ('', parametros.get('type', 'Other')))
+                if parametros.get('blockedReason') == 'inspector':
+                    estadisticas['bloqueadas'] += 1
+                    estadisticas['bloqueadas_por_tipo'][tipo] = estadisticas['bloqueadas_por_tipo'].get(tipo, 0) + 1
+    
+    def _fusionar_red(self, red):
+        """Sumar las estadísticas de red de un worker"""
+        if not red:
+            return
+        for clave in ('solicitudes', 'bytes', 'bloqueables', 'bytes_bloqueables', 'bloqueadas'):
+            self.estadisticas_red[clave] += red.get(clave, 0)
+        for tipo, cantidad in red.get('bloqueadas_por_tipo', {}).items():
+            self.estadisticas_red['bloqueadas_por_tipo'][tipo] = self.estadisticas_red['bloqueadas_por_tipo'].get(tipo, 0) + cantidad
+        for tipo, (tamano, cantidad) in red.get('bytes_por_tipo', {}).items():
+            por_tipo = self.estadisticas_red['bytes_por_tipo'].setdefault(tipo, [0, 0])
+            por_tipo[0] += tamano
+            por_tipo[1] += cantidad
+    
+    def _resumen_red(self):
+        """Bloque 'red' del reporte; en modo medir actualiza los promedios por tipo en disco"""
+        modo = self._modo_bloqueo_red()
+        if modo == 'desactivado':
+            return {'modo': modo}
+        
+        self._recolectar_red()
+        estadisticas = self.estadisticas_red
+        promedios = _leer_json(ARCHIVO_PROMEDIOS_RED, {})
+        
+        resumen = {
+            'modo': modo,
+            'solicitudes_completadas': estadisticas['solicitudes'],
+            'bytes_descargados': estadisticas['bytes'],
+        }
+        if modo == 'medir':
+            try:
+                # Solo lo escribe el proceso principal (reporte final); el rename evita dejar un JSON a medias
+                for tipo, (tamano, cantidad) in estadisticas['bytes_por_tipo'].items():
+                    acumulado = promedios.setdefault(tipo, [0, 0])
+                    acumulado[0] += tamano
+                    acumulado[1] += cantidad
+                os.makedirs(DIRECTORIO_ESTADO, exist_ok=True)
+                _escribir_json_atomico(ARCHIVO_PROMEDIOS_RED, promedios)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudieron guardar promedios de red: {e}")
+            resumen['solicitudes_bloqueables'] = estadisticas['bloqueables']
+            resumen['bytes_bloqueables'] = estadisticas['bytes_bloqueables']
+        else:
+            estimado = sum(
+                cantidad * promedios[tipo][0] / promedios[tipo][1]
+                for tipo, cantidad in estadisticas['bloqueadas_por_tipo'].items()
+                if promedios.get(tipo, [0, 0])[1]
+            )
+            resumen['solicitudes_bloqueadas'] = estadisticas['bloqueadas']
+            resumen['bloqueadas_por_tipo'] = estadisticas['bloqueadas_por_tipo']
+            resumen['bytes_ahorrados_estimados'] = int(estimado) if promedios else None
+        return resumen
+    
     def configurar_navegador(self):
         """🔧 CONFIGURACIÓN CHROME ULTRA-EXPLÍCITA (GARANTIZA NO-PROXY)"""
         logger.info("🔧 Configurando navegador con configuración ultra-explícita...")
@@ -479,15 +2156,19 @@ class SalvumAutomacionCorregida:
         }
         options.add_experimental_option("prefs", prefs)
         
+        if self._modo_bloqueo_red() != 'desactivado':
+            # Logs de performance para contar solicitudes y bytes (eventos Network.*)
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        
         try:
             logger.info("🚀 Iniciando Chrome con configuración ultra-explícita...")
             
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
+            self._iniciar_chrome(options)
+            self._configurar_bloqueo_red()
             
             self.driver.set_page_load_timeout(90)
-            self.driver.implicitly_wait(20)
-            self.wait = WebDriverWait(self.driver, 45)  # Aumentado para Angular
+            # Sin espera implícita: cada búsqueda lleva su propio deadline (ver _buscar)
+            self.driver.implicitly_wait(0)
             
             self.driver.execute_script("""
                 Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
@@ -509,15 +2190,107 @@ class SalvumAutomacionCorregida:
             for var, value in env_backup.items():
                 os.environ[var] = value
         
+    def _ritmo(self):
+        """Perfil de ritmo activo (config 'perfil_ritmo' o SALVUM_PERFIL_RITMO)"""
+        if self._perfil_ritmo is None:
+            nombre = self._leer_opcion('perfil_ritmo', 'SALVUM_PERFIL_RITMO', 'balanced')
+            perfiles = {clave: dict(valor) for clave, valor in PERFILES_RITMO.items()}
+            for clave, personalizado in self.config.get('perfiles_ritmo', {}).items():
+                perfiles.setdefault(clave, dict(PERFILES_RITMO['balanced'])).update(personalizado)
+            
+            if nombre not in perfiles:
+                logger.warning(f"⚠️ Perfil de ritmo '{nombre}' desconocido, usando 'balanced'")
+                nombre = 'balanced'
+            
+            self._perfil_ritmo = dict(perfiles[nombre], nombre=nombre)
+            logger.info(f"🎚️ Perfil de ritmo: {nombre}")
+        return self._perfil_ritmo
+    
     def _espera_humana(self, min_seg=1, max_seg=4, motivo="acción"):
-        """Espera aleatoria que simula comportamiento humano"""
+        """Espera aleatoria que simula comportamiento humano (ajustada al perfil de ritmo)"""
         import random
-        tiempo = random.uniform(min_seg, max_seg)
+        perfil = self._ritmo()
+        
+        for clave, rango in perfil.get('motivos', {}).items():
+            if clave in motivo:
+                min_seg, max_seg = rango
+                break
+        else:
+            min_seg, max_seg = min_seg * perfil['factor'], max_seg * perfil['factor']
+        
+        tiempo = self._acotar_al_paso(random.uniform(min_seg, max_seg))
+        self.tiempo_espera_humana += tiempo
         logger.info(f"⏳ Esperando {tiempo:.1f}s ({motivo})...")
         time.sleep(tiempo)
     
+    def _esperar_pagina_lista(self, motivo, selector=None, texto_opcion=None, selects_cargados=0, timeout=30):
+        """Esperar señales reales en vez de un sleep fijo.
+        
+        Lista = documento cargado, Angular estable (testability API), sin XHR/fetch
+        pendientes y, si se indica, el objetivo presente: un elemento visible por
+        selector, algún select con una opción que contenga texto_opcion, o al menos
+        selects_cargados selects con opciones. Al final se agrega un jitter humano corto.
+        Si se agota el timeout se continúa igual (el paso siguiente decidirá).
+        Si con la sesión iniciada aparece el login, lanza SesionExpiradaError.
+        Dentro de un paso del flujo el timeout se recorta a lo que le queda al paso, y si la
+        página no quedó lista porque el paso se quedó sin tiempo se lanza TimeoutException.
+        """
+        self._verificar_limite_paso(motivo)
+        recortado = self._acotar_al_paso(timeout) < timeout
+        timeout = self._acotar_al_paso(timeout)
+        inicio = time.monotonic()
+        consecutivos = 0
+        logins = 0
+        estado = None
+        
+        # Dar tiempo a que el click anterior dispare la navegación/XHR antes de sondear
+        time.sleep(0.5)
+        
+        while time.monotonic() - inicio < timeout:
+            try:
+                estado = self.driver.execute_script(
+                    SCRIPT_ESTADO_PAGINA, selector, (texto_opcion or '').lower(), selects_cargados
+                )
+            except Exception:
+                estado = None
+            
+            if self.sesion_iniciada and estado and estado.get('login'):
+                logins += 1
+                if logins >= 2:
+                    raise SesionExpiradaError(f"Formulario de login visible ({motivo})")
+            else:
+                logins = 0
+            
+            if estado and estado['documento'] and estado['estable'] and estado['red'] == 0 and estado['objetivo']:
+                consecutivos += 1
+                if consecutivos >= 2:
+                    break
+            else:
+                consecutivos = 0
+            time.sleep(0.25)
+        
+        transcurrido = time.monotonic() - inicio
+        if consecutivos >= 2:
+            logger.info(f"🅰️ Página lista en {transcurrido:.1f}s ({motivo})")
+            listo = True
+        else:
+            logger.warning(f"⚠️ Página no lista tras {transcurrido:.1f}s ({motivo}) - último estado: {estado}")
+            listo = False
+        
+        self._instantanea_dom(motivo)
+        self._recolectar_red()
+        if not listo and recortado:
+            self._verificar_limite_paso(motivo)
+        
+        if self._leer_opcion('jitter_humano', 'SALVUM_JITTER_HUMANO', True):
+            self._espera_humana(0.3, 1.2, f"jitter humano - {motivo}")
+        
+        return listo
+    
     def _mover_mouse_humano(self, elemento):
         """Simular movimiento de mouse humano hacia elemento"""
+        if not self._ritmo().get('mover_mouse', True):
+            return
         try:
             self.driver.execute_script("""
                 var elemento = arguments[0];
@@ -543,10 +2316,14 @@ class SalvumAutomacionCorregida:
             campo.clear()
             self._espera_humana(0.5, 1, "después de limpiar")
             
-            for char in texto:
-                campo.send_keys(char)
-                pausa = random.uniform(0.05, 0.15)
-                time.sleep(pausa)
+            pausa_tipeo = self._ritmo().get('tipeo')
+            if pausa_tipeo:
+                for char in texto:
+                    campo.send_keys(char)
+                    pausa = random.uniform(*pausa_tipeo)
+                    time.sleep(pausa)
+            else:
+                campo.send_keys(texto)
             
             self._espera_humana(0.5, 1.5, "después de tipear")
             
@@ -579,6 +2356,8 @@ class SalvumAutomacionCorregida:
     
     def _leer_pagina_humano(self):
         """Simular que un humano está leyendo la página"""
+        if not self._ritmo().get('leer_pagina', True):
+            return
         try:
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/4);")
             self._espera_humana(1, 2, "leyendo inicio")
@@ -592,8 +2371,241 @@ class SalvumAutomacionCorregida:
         except:
             self._espera_humana(2, 5, "leyendo página")
     
+    def _cifrador_sesion(self):
+        """Fernet para el archivo de sesión (None si no hay cryptography o credenciales)
+        
+        La clave se deriva con PBKDF2-HMAC-SHA256 y sal aleatoria (ARCHIVO_SAL_SESION) a partir de
+        SALVUM_CLAVE_SESION o, si no existe, de usuario y contraseña: si cambian las credenciales
+        la sesión guardada deja de servir.
+        """
+        if Fernet is None:
+            return None
+        clave = os.getenv('SALVUM_CLAVE_SESION')
+        if clave:
+            material = clave.encode('utf-8')
+        else:
+            usuario = os.getenv('SALVUM_USER', '')
+            password = os.getenv('SALVUM_PASS', '')
+            if not password:
+                return None
+            material = f"salvum-sesion:{usuario}:{password}".encode('utf-8')
+        
+        huella = hashlib.sha256(material).hexdigest()
+        if self._cifrador_cache[0] != huella:
+            try:
+                sal = self._sal_sesion()
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Sin sal para la clave de sesión, no se reutiliza: {e}")
+                return None
+            kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=sal, iterations=ITERACIONES_CLAVE_SESION)
+            self._cifrador_cache = (huella, Fernet(base64.urlsafe_b64encode(kdf.derive(material))))
+        return self._cifrador_cache[1]
+    
+    def _sal_sesion(self):
+        """Leer la sal de la clave de sesión o crearla (O_EXCL: si dos workers compiten, gana uno)"""
+        os.makedirs(DIRECTORIO_ESTADO, exist_ok=True)
+        try:
+            descriptor = os.open(ARCHIVO_SAL_SESION, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            for _ in range(10):
+                with open(ARCHIVO_SAL_SESION, 'rb') as f:
+                    sal = f.read()
+                if len(sal) == 16:
+                    return sal
+                time.sleep(0.1)  # el que la creó todavía la está escribiendo
+            raise ValueError("Sal de sesión ilegible")
+        sal = os.urandom(16)
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(sal)
+            f.flush()
+            os.fsync(f.fileno())
+        return sal
+    
+    def _reutilizar_sesion(self):
+        if not self._leer_opcion('reutilizar_sesion', 'SALVUM_REUTILIZAR_SESION', True):
+            return False
+        if Fernet is None:
+            logger.info("ℹ️ cryptography no instalado - sesión no se reutiliza")
+            return False
+        return True
+    
+    def _guardar_sesion(self):
+        """Guardar cookies y local/session storage cifrados tras un login exitoso"""
+        if not self._reutilizar_sesion():
+            return
+        cifrador = self._cifrador_sesion()
+        if not cifrador:
+            return
+        
+        try:
+            almacenamiento = self.driver.execute_script("""
+                var copiar = function (s) {
+                    var datos = {};
+                    for (var i = 0; i < s.length; i++) { datos[s.key(i)] = s.getItem(s.key(i)); }
+                    return datos;
+                };
+                return {local: copiar(window.localStorage), session: copiar(window.sessionStorage)};
+            """)
+            sesion = {
+                'usuario': os.getenv('SALVUM_USER', ''),
+                'guardada': time.time(),
+                'cookies': self.driver.get_cookies(),
+                'local_storage': almacenamiento.get('local', {}),
+                'session_storage': almacenamiento.get('session', {})
+            }
+            
+            os.makedirs(DIRECTORIO_ESTADO, exist_ok=True)
+            temporal = f"{ARCHIVO_SESION}.{os.getpid()}.tmp"
+            with open(temporal, 'wb') as f:
+                f.write(cifrador.encrypt(json.dumps(sesion).encode('utf-8')))
+            os.replace(temporal, ARCHIVO_SESION)
+            logger.info(f"🍪 Sesión guardada ({len(sesion['cookies'])} cookies)")
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar la sesión: {e}")
+    
+    def _descartar_sesion(self):
+        try:
+            os.remove(ARCHIVO_SESION)
+        except OSError:
+            pass
+    
+    def _restaurar_sesion(self):
+        """Intentar entrar con la sesión guardada, sin pasar por el formulario de login.
+        
+        Las cookies se cargan por CDP antes de navegar y el storage se siembra con un
+        script que corre antes que la app; luego se va directo a /credit-request.
+        """
+        if not self._reutilizar_sesion() or not os.path.exists(ARCHIVO_SESION):
+            return False
+        cifrador = self._cifrador_sesion()
+        if not cifrador:
+            return False
+        
+        try:
+            with open(ARCHIVO_SESION, 'rb') as f:
+                sesion = json.loads(cifrador.decrypt(f.read()))
+        except (InvalidToken, ValueError, OSError) as e:
+            logger.warning(f"⚠️ Sesión guardada ilegible, se descarta: {type(e).__name__}")
+            self._descartar_sesion()
+            return False
+        
+        max_horas = self._leer_opcion('sesion_max_horas', 'SALVUM_SESION_MAX_HORAS', 12)
+        edad_horas = (time.time() - sesion.get('guardada', 0)) / 3600
+        if sesion.get('usuario') != os.getenv('SALVUM_USER', '') or edad_horas > max_horas:
+            logger.info(f"ℹ️ Sesión guardada no aplicable (edad {edad_horas:.1f}h)")
+            self._descartar_sesion()
+            return False
+        
+        logger.info(f"🍪 Restaurando sesión guardada hace {edad_horas:.1f}h...")
+        inicio = time.monotonic()
+        script_storage = None
+        try:
+            cookies = []
+            for cookie in sesion.get('cookies', []):
+                cookie_cdp = {k: v for k, v in cookie.items() if k in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')}
+                if 'expiry' in cookie:
+                    cookie_cdp['expires'] = cookie['expiry']
+                cookies.append(cookie_cdp)
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+            
+            script_storage = self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                'source': """
+                    if (location.origin === %s) {
+                        var local = %s, session = %s;
+                        Object.keys(local).forEach(function (k) { localStorage.setItem(k, local[k]); });
+                        Object.keys(session).forEach(function (k) { sessionStorage.setItem(k, session[k]); });
+                    }
+                """ % (json.dumps(URL_SALVUM), json.dumps(sesion.get('local_storage', {})),
+                       json.dumps(sesion.get('session_storage', {})))
+            })
+            
+            self.driver.get(f"{URL_SALVUM}/credit-request")
+            self._esperar_pagina_lista("validando sesión restaurada", selector="button[value='NUEVA SOLICITUD']", timeout=20)
+            
+            valida = False
+            if "login" not in self.driver.current_url.lower():
+                try:
+                    self._buscar("button[value='NUEVA SOLICITUD']", requerido=False)
+                    valida = True
+                except NoSuchElementException:
+                    pass
+        except Exception as e:
+            logger.warning(f"⚠️ Error restaurando sesión: {e}")
+            valida = False
+        finally:
+            if script_storage:
+                try:
+                    self.driver.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument',
+                                                {'identifier': script_storage['identifier']})
+                except Exception:
+                    pass
+        
+        if valida:
+            logger.info(f"✅ Sesión restaurada en {time.monotonic() - inicio:.1f}s - login completo omitido")
+            return True
+        
+        logger.warning("⚠️ Sesión guardada inválida - se hará login completo")
+        self._descartar_sesion()
+        try:
+            self.driver.delete_all_cookies()
+            self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass
+        return False
+    
+    def _sesion_expirada(self):
+        """True si el navegador quedó en el login (URL o formulario visible)"""
+        try:
+            return bool(self.driver.execute_script(f"return {SCRIPT_LOGIN_VISIBLE};"))
+        except Exception:
+            return False
+    
+    def _reautenticar(self, reiniciar_navegador=False):
+        """Volver a iniciar sesión tras una expiración; si el navegador murió, primero uno nuevo"""
+        self.relogins += 1
+        if reiniciar_navegador:
+            logger.warning(f"💥 Navegador caído - reiniciando Chrome y re-login #{self.relogins}")
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+            if not self.configurar_navegador():
+                logger.error("❌ No se pudo reiniciar el navegador")
+                return False
+        else:
+            # La sesión guardada es la que expiró; tras un crash del navegador sigue sirviendo
+            logger.warning(f"🔐 Sesión expirada - re-login #{self.relogins}")
+            self._descartar_sesion()
+        with self._cronometrar('login'):
+            login_ok = self.realizar_login()
+        if login_ok:
+            logger.info("✅ Sesión recuperada")
+            return True
+        logger.error("❌ No se pudo recuperar la sesión")
+        return False
+    
     def realizar_login(self):
-        """Login híbrido (VPS para verificaciones + Chrome directo)"""
+        """Login híbrido (VPS para verificaciones + Chrome directo).
+        
+        Si falla se escriben las capturas retenidas de los intentos (con la política 'fallos' solo quedan en memoria)
+        y la bitácora DOM.
+        """
+        if self._login_con_reintentos():
+            return True
+        self.capturas.volcar()
+        self._volcar_diagnostico('login')
+        return False
+    
+    def _login_con_reintentos(self):
+        """Restaurar la sesión guardada o hacer login completo, hasta 3 intentos"""
+        self.sesion_iniciada = False
+        if self._restaurar_sesion():
+            self.metricas.incrementar('login_intentos', resultado='sesion_restaurada')
+            self.sesion_iniciada = True
+            return True
+        
         logger.info("🔐 Realizando login HÍBRIDO (VPS verificaciones + Chrome directo)...")
         
         max_intentos = 3
@@ -619,14 +2631,13 @@ class SalvumAutomacionCorregida:
                 logger.info(f"📄 Título: {titulo}")
                 logger.info(f"📊 HTML size: {html_size}")
                 
-                screenshot_name = f'salvum_acceso_directo_intento_{intento}.png'
-                self.driver.save_screenshot(screenshot_name)
-                logger.info(f"📸 Screenshot: {screenshot_name}")
+                self._capturar(f'salvum_acceso_directo_intento_{intento}')
                 
                 page_source = self.driver.page_source.lower()
                 
                 if "bbva" in titulo.lower():
                     logger.error(f"❌ Intento {intento}: Redirigido a BBVA")
+                    self.metricas.incrementar('login_intentos', resultado='redirigido_bbva')
                     if intento < max_intentos:
                         time.sleep(20)
                         continue
@@ -634,6 +2645,7 @@ class SalvumAutomacionCorregida:
                     
                 elif html_size < 5000:
                     logger.error(f"❌ Intento {intento}: Página muy pequeña")
+                    self.metricas.incrementar('login_intentos', resultado='pagina_incompleta')
                     if intento < max_intentos:
                         time.sleep(15)
                         continue
@@ -641,9 +2653,18 @@ class SalvumAutomacionCorregida:
                     
                 elif any(palabra in page_source for palabra in ["salvum", "usuario", "login", "ob forum"]):
                     logger.info(f"✅ Intento {intento}: ACCESO EXITOSO a Salvum")
-                    return self._realizar_login_optimizado()
+                    exito = self._realizar_login_optimizado()
+                    self.metricas.incrementar('login_intentos', resultado='exito' if exito else 'rechazado')
+                    if exito:
+                        self.capturas.descartar()
+                        self.bitacora_dom.descartar()
+                        self.sesion_iniciada = True
+                        self._guardar_sesion()
+                        return True
+                    return False
                 else:
                     logger.warning(f"⚠️ Intento {intento}: Estado desconocido")
+                    self.metricas.incrementar('login_intentos', resultado='estado_desconocido')
                     if intento < max_intentos:
                         time.sleep(10)
                         continue
@@ -651,6 +2672,7 @@ class SalvumAutomacionCorregida:
                     
             except Exception as e:
                 logger.error(f"❌ Error en intento {intento}: {e}")
+                self.metricas.incrementar('login_intentos', resultado='error')
                 if intento < max_intentos:
                     time.sleep(15)
                     continue
@@ -697,9 +2719,7 @@ class SalvumAutomacionCorregida:
             # CAMPO USUARIO - Selector exacto: input[id="Usuario"][name="Usuario"]
             logger.info("👤 Buscando campo Usuario...")
             try:
-                campo_usuario = self.wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "input[id='Usuario'][name='Usuario']"))
-                )
+                campo_usuario = self._buscar("input[id='Usuario'][name='Usuario']", clickable=True)
                 logger.info("✅ Campo Usuario encontrado con selector exacto")
                 self._mover_mouse_humano(campo_usuario)
                 self._espera_humana(0.5, 1, "inspeccionando campo usuario")
@@ -707,7 +2727,7 @@ class SalvumAutomacionCorregida:
                 logger.error(f"❌ No se encontró campo Usuario con selector exacto: {e}")
                 # Fallback a selectores genéricos
                 try:
-                    campo_usuario = self.driver.find_element(By.CSS_SELECTOR, "input[type='text']")
+                    campo_usuario = self._buscar("input[type='text']", requerido=False)
                     logger.info("⚠️ Campo Usuario encontrado con selector genérico")
                 except:
                     logger.error("❌ No se encontró campo Usuario")
@@ -716,9 +2736,7 @@ class SalvumAutomacionCorregida:
             # CAMPO CONTRASEÑA - Selector exacto: input[id="Contraseña"][name="Contraseña"]
             logger.info("🔒 Buscando campo Contraseña...")
             try:
-                campo_password = self.wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "input[id='Contraseña'][name='Contraseña']"))
-                )
+                campo_password = self._buscar("input[id='Contraseña'][name='Contraseña']", clickable=True)
                 logger.info("✅ Campo Contraseña encontrado con selector exacto")
                 self._mover_mouse_humano(campo_password)
                 self._espera_humana(0.5, 1, "inspeccionando campo contraseña")
@@ -726,7 +2744,7 @@ class SalvumAutomacionCorregida:
                 logger.error(f"❌ No se encontró campo Contraseña con selector exacto: {e}")
                 # Fallback a selector genérico
                 try:
-                    campo_password = self.driver.find_element(By.CSS_SELECTOR, "input[type='password']")
+                    campo_password = self._buscar("input[type='password']", requerido=False)
                     logger.info("⚠️ Campo Contraseña encontrado con selector genérico")
                 except:
                     logger.error("❌ No se encontró campo Contraseña")
@@ -807,15 +2825,12 @@ class SalvumAutomacionCorregida:
             except Exception as verificacion_error:
                 logger.warning(f"Error verificando campos: {verificacion_error}")
             
-            self.driver.save_screenshot('salvum_antes_submit_precisos.png')
-            logger.info("📸 Screenshot antes de submit con selectores precisos")
+            self._capturar('salvum_antes_submit_precisos')
             
             # BOTÓN INGRESAR - Selector exacto: button[value="INGRESAR"]
             logger.info("🔘 Buscando botón INGRESAR con selector preciso...")
             try:
-                boton_submit = self.wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button[value='INGRESAR']"))
-                )
+                boton_submit = self._buscar("button[value='INGRESAR']", clickable=True)
                 logger.info("✅ Botón INGRESAR encontrado con selector exacto")
                 self._mover_mouse_humano(boton_submit)
                 self._espera_humana(0.5, 1, "inspeccionando botón")
@@ -823,7 +2838,7 @@ class SalvumAutomacionCorregida:
                 logger.warning(f"⚠️ No se encontró con selector exacto: {e}")
                 # Fallback a selector por texto
                 try:
-                    boton_submit = self.driver.find_element(By.XPATH, "//button[contains(text(), 'INGRESAR')]")
+                    boton_submit = self._buscar("//button[contains(text(), 'INGRESAR')]", requerido=False, by=By.XPATH)
                     logger.info("⚠️ Botón INGRESAR encontrado por texto")
                 except:
                     logger.error("❌ No se encontró botón INGRESAR")
@@ -917,8 +2932,7 @@ class SalvumAutomacionCorregida:
                 except Exception as verificacion_error:
                     logger.warning(f"Error en verificación adicional: {verificacion_error}")
             
-            self.driver.save_screenshot('salvum_despues_submit_precisos.png')
-            logger.info("📸 Screenshot después de submit con selectores precisos")
+            self._capturar('salvum_despues_submit_precisos')
             
             nueva_url = self.driver.current_url
             nuevo_titulo = self.driver.title
@@ -1049,15 +3063,10 @@ class SalvumAutomacionCorregida:
                         logger.info("   4. Verificar si el sitio requiere captcha o 2FA ahora")
                     
                     # Screenshot adicional para debug
-                    self.driver.save_screenshot('debug_login_fallido_completo.png')
+                    self._capturar('debug_login_fallido_completo', error=True)
                     
-                    # Guardar HTML para análisis
-                    try:
-                        with open('debug_login_page_source.html', 'w', encoding='utf-8') as f:
-                            f.write(self.driver.page_source)
-                        logger.info("📄 HTML guardado en debug_login_page_source.html para análisis")
-                    except:
-                        pass
+                    # Bitácora DOM (incluye el HTML) para análisis
+                    self._volcar_diagnostico('login_fallido')
                     
                 except Exception as debug_error:
                     logger.warning(f"Error en debug: {debug_error}")
@@ -1066,860 +3075,1172 @@ class SalvumAutomacionCorregida:
                 
         except Exception as e:
             logger.error(f"❌ Error en proceso de login con selectores precisos: {e}")
-            self.driver.save_screenshot('error_login_precisos.png')
+            self._capturar('error_login_precisos', error=True)
+            self._volcar_diagnostico('error_login')
             return False
     
-    def procesar_cliente_individual(self, cliente_data):
-        """Procesar un cliente individual en Salvum CON SELECTORES ANGULAR CORREGIDOS"""
-        nombre = cliente_data['Nombre Cliente']
-        agente = cliente_data['agente']
+    def _buscar(self, selector, requerido=True, clickable=False, by=By.CSS_SELECTOR, timeout=None):
+        """Buscar un elemento con deadline explícito (la espera implícita del driver está en 0).
         
-        logger.info(f"👤 Procesando: {nombre} ({agente})")
+        Los elementos requeridos usan el presupuesto largo (busqueda_requerida_seg, 20s) y los
+        opcionales el corto (busqueda_opcional_seg, 2s), salvo que se pase timeout.
+        Si el elemento no aparece a tiempo se lanza NoSuchElementException.
+        """
+        if timeout is None:
+            if requerido:
+                timeout = self._leer_opcion('busqueda_requerida_seg', 'SALVUM_BUSQUEDA_REQUERIDA', 20)
+            else:
+                timeout = self._leer_opcion('busqueda_opcional_seg', 'SALVUM_BUSQUEDA_OPCIONAL', 2)
+        timeout = self._acotar_al_paso(timeout)
+        
+        condicion = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+        tipo = 'requerido' if requerido else 'opcional'
+        inicio = time.monotonic()
         
         try:
-            self.actualizar_estado_cliente(cliente_data, "PROCESANDO")
-            
-            # ============= PASO 1: BUSCAR Y HACER CLICK EN "NUEVA SOLICITUD" =============
-            logger.info("🔘 PASO 1: Buscando botón Nueva Solicitud...")
-            
-            url_actual = self.driver.current_url
-            logger.info(f"📍 URL actual: {url_actual}")
-            
-            # Si no estamos en credit-request, navegar primero
-            if "credit-request" not in url_actual.lower():
-                logger.info("🔄 Navegando a página de solicitudes...")
-                self.driver.get("https://prescriptores.salvum.cl/credit-request")
-                self._espera_humana(3, 6, "cargando página de solicitudes")
-            
-            # USAR SELECTOR EXACTO DEL BOTÓN NUEVA SOLICITUD
-            try:
-                btn_nueva_solicitud = self.wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button[value='NUEVA SOLICITUD']"))
-                )
-                logger.info("✅ Botón Nueva Solicitud encontrado con selector exacto")
-                self._click_humano(btn_nueva_solicitud)
-                self._espera_humana(4, 8, "cargando formulario de nueva solicitud")
-            except:
-                logger.error("❌ No se encontró botón Nueva Solicitud")
-                self.driver.save_screenshot(f"error_nueva_solicitud_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-                raise Exception("No se encontró botón Nueva Solicitud")
-            
-            # ============= PASO 2: LLENAR FORMULARIO INICIAL =============
-            logger.info("📋 PASO 2: Llenando formulario inicial con selectores precisos...")
-            
-            # 1. RUT - id="RUT" name="RUT"
-            logger.info("🆔 Llenando RUT...")
-            try:
-                campo_rut = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "input[id='RUT'][name='RUT']")))
-                self._click_humano(campo_rut)
-                self._tipear_humano(campo_rut, str(cliente_data['RUT']))
-                logger.info("✅ RUT llenado exitosamente")
-            except:
-                logger.error("❌ Error llenando RUT")
-                raise Exception("No se pudo llenar RUT")
-            
-            # 2. Número de Celular - id="Número de Celular" name="Número de Celular"
-            logger.info("📱 Llenando Número de Celular...")
-            try:
-                campo_celular = self.driver.find_element(By.CSS_SELECTOR, "input[id='Número de Celular'][name='Número de Celular']")
-                self._click_humano(campo_celular)
-                self._tipear_humano(campo_celular, str(cliente_data['Telefono']))
-                logger.info("✅ Número de Celular llenado exitosamente")
-            except:
-                logger.warning("⚠️ No se pudo llenar Número de Celular")
-            
-            # 3. Correo Electrónico - id="Correo electrónico" name="Correo electrónico"
-            logger.info("📧 Llenando Correo Electrónico...")
-            try:
-                campo_email = self.driver.find_element(By.CSS_SELECTOR, "input[id='Correo electrónico'][name='Correo electrónico']")
-                self._click_humano(campo_email)
-                self._tipear_humano(campo_email, str(cliente_data['Email']))
-                logger.info("✅ Correo Electrónico llenado exitosamente")
-            except:
-                logger.warning("⚠️ No se pudo llenar Correo Electrónico")
-            
-            # 4. Nombre - id="Nombre" name="Nombre"
-            logger.info("👤 Llenando Nombre...")
-            try:
-                nombre_partes = cliente_data['Nombre Cliente'].split()
-                primer_nombre = nombre_partes[0] if nombre_partes else cliente_data['Nombre Cliente']
-                
-                campo_nombre = self.driver.find_element(By.CSS_SELECTOR, "input[id='Nombre'][name='Nombre']")
-                self._click_humano(campo_nombre)
-                self._tipear_humano(campo_nombre, primer_nombre)
-                logger.info("✅ Nombre llenado exitosamente")
-            except:
-                logger.warning("⚠️ No se pudo llenar Nombre")
-            
-            # 5. Apellidos - id="Apellidos" name="Apellidos" - VALOR FIJO: Gonzalez
-            logger.info("👨‍👩‍👧‍👦 Llenando Apellidos...")
-            try:
-                campo_apellidos = self.driver.find_element(By.CSS_SELECTOR, "input[id='Apellidos'][name='Apellidos']")
-                self._click_humano(campo_apellidos)
-                self._tipear_humano(campo_apellidos, "Gonzalez")
-                logger.info("✅ Apellidos llenado exitosamente")
-            except:
-                logger.warning("⚠️ No se pudo llenar Apellidos")
-            
-            # 6. Fecha de Nacimiento - input[type="date"] - VALOR FIJO: 1987-08-25
-            logger.info("🎂 Llenando Fecha de Nacimiento...")
-            try:
-                campo_fecha = self.driver.find_element(By.CSS_SELECTOR, "input[type='date']")
-                # Usar JavaScript para campos de fecha que no son interactables
-                self.driver.execute_script("arguments[0].value = '1987-08-25';", campo_fecha)
+            elemento = WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(condicion((by, selector)))
+        except TimeoutException:
+            duracion = time.monotonic() - inicio
+            self._registrar_busqueda(duracion, False)
+            logger.info(f"🔎 No encontrado en {duracion:.2f}s ({tipo}): {selector}")
+            raise NoSuchElementException(f"No se encontró '{selector}' en {timeout}s")
+        
+        duracion = time.monotonic() - inicio
+        self._registrar_busqueda(duracion, True)
+        logger.info(f"🔎 Encontrado en {duracion:.2f}s ({tipo}): {selector}")
+        return elemento
+    
+    @property
+    def capturas(self):
+        """Gestor de capturas (se crea al primer uso, cuando config.json ya está cargado)"""
+        if self._capturas is None:
+            self._capturas = GestorCapturas(
+                politica=self._leer_opcion('politica_capturas', 'SALVUM_POLITICA_CAPTURAS', 'fallos'),
+                ancho_max=self._leer_opcion('capturas_ancho_max', 'SALVUM_CAPTURAS_ANCHO', 960),
+                calidad=self._leer_opcion('capturas_calidad', 'SALVUM_CAPTURAS_CALIDAD', 70),
+                max_mb=self._leer_opcion('capturas_max_mb', 'SALVUM_CAPTURAS_MAX_MB', 50)
+            )
+        return self._capturas
+    
+    def _capturar(self, nombre, error=False):
+        return self.capturas.capturar(self.driver, nombre, error=error)
+    
+    def _consultar_pagina(self):
+        """Selects e inputs de la página en un solo execute_script (ver SCRIPT_CONSULTA_PAGINA)"""
+        return self.driver.execute_script(SCRIPT_CONSULTA_PAGINA)
+    
+    def _seleccionar_opcion(self, posicion, texto=None, valor=None, indice=None):
+        """Seleccionar en el select N° posicion; devuelve el texto elegido o None si no había tal opción"""
+        return self.driver.execute_script(
+            SCRIPT_SELECCIONAR_OPCION, posicion, {'texto': texto, 'valor': valor, 'indice': indice}
+        )
+    
+    def _instantanea_dom(self, motivo):
+        """Registrar URL, título, estado de formularios (y HTML opcional) en un solo execute_script"""
+        if not self._leer_opcion('bitacora_dom', 'SALVUM_BITACORA_DOM', True) or not self.driver:
+            return None
+        try:
+            instantanea = self.driver.execute_script(
+                SCRIPT_INSTANTANEA_DOM, self._leer_opcion('bitacora_dom_html', 'SALVUM_BITACORA_DOM_HTML', False)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo tomar instantánea DOM ({motivo}): {e}")
+            return None
+        self.bitacora_dom.registrar(motivo, instantanea)
+        return instantanea
+    
+    def _volcar_diagnostico(self, nombre):
+        """Falla: escribir la bitácora DOM acumulada junto a las capturas de la ejecución"""
+        self._instantanea_dom(f"falla: {nombre}")
+        try:
+            ruta = self.bitacora_dom.volcar(self.capturas.directorio, nombre)
+            if ruta:
+                logger.info(f"🧾 Bitácora DOM guardada: {ruta}")
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar la bitácora DOM: {e}")
+    
+    @contextmanager
+    def _cronometrar(self, paso):
+        """Medir un paso con reloj monotónico (queda registrado aunque el paso falle)"""
+        inicio = time.monotonic()
+        try:
+            yield
+        finally:
+            duracion = time.monotonic() - inicio
+            self._tiempos_cliente[paso] = round(self._tiempos_cliente.get(paso, 0) + duracion, 2)
+            self.tiempos_pasos.setdefault(paso, []).append(duracion)
+            logger.info(f"⏱️ Paso {paso}: {duracion:.1f}s")
+    
+    def _resumen_tiempos_pasos(self):
+        """p50/p90/max por paso para el reporte"""
+        return {
+            paso: {
+                'n': len(duraciones),
+                'p50': round(_percentil(duraciones, 0.5), 2),
+                'p90': round(_percentil(duraciones, 0.9), 2),
+                'max': round(max(duraciones), 2)
+            }
+            for paso, duraciones in self.tiempos_pasos.items() if duraciones
+        }
+    
+    def _registrar_busqueda(self, duracion, encontrado):
+        self.estadisticas_busqueda['total'] += 1
+        self.estadisticas_busqueda['segundos'] += duracion
+        if not encontrado:
+            self.estadisticas_busqueda['fallidas'] += 1
+            self.estadisticas_busqueda['segundos_fallidas'] += duracion
+    
+    def _usar_llenado_masivo(self):
+        """Llenado en un solo execute_script (config 'llenado_masivo', SALVUM_LLENADO_MASIVO o el perfil de ritmo)"""
+        return self._leer_opcion('llenado_masivo', 'SALVUM_LLENADO_MASIVO', self._ritmo().get('llenado_masivo', False))
+    
+    def _llenar_formulario_masivo(self, campos):
+        """Llenar todos los campos y disparar input/change/blur de Angular en un solo round trip.
+        
+        Después de que Angular se estabiliza se lee la validez de cada campo en otra
+        llamada. Devuelve los campos que no quedaron aceptados, para llenarlos a mano.
+        """
+        logger.info(f"⚡ Llenado masivo de {len(campos)} campos...")
+        especificacion = [{'nombre': c['nombre'], 'selector': c['selector'], 'valor': c['valor']} for c in campos]
+        
+        try:
+            encontrados = self.driver.execute_script("""
+                var campos = arguments[0];
+                var setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+                var encontrados = {};
+                campos.forEach(function(c) {
+                    var el = document.querySelector(c.selector);
+                    encontrados[c.nombre] = !!el;
+                    if (!el) { return; }
+                    el.focus();
+                    setter.call(el, c.valor);
+                    el.dispatchEvent(new Event('input', { bubbles: true }));
+                    el.dispatchEvent(new Event('change', { bubbles: true }));
+                    el.dispatchEvent(new Event('blur', { bubbles: true }));
+                    el.blur();
+                });
+                return encontrados;
+            """, especificacion)
+            
+            self._esperar_pagina_lista("validación Angular del formulario inicial")
+            
+            estado = self.driver.execute_script("""
+                var campos = arguments[0];
+                // Las máscaras del portal pueden agregar puntos/guiones/espacios al valor
+                var normalizar = function(v) { return String(v).replace(/[^0-9a-z@]/gi, '').toLowerCase(); };
+                var resultado = {};
+                campos.forEach(function(c) {
+                    var el = document.querySelector(c.selector);
+                    resultado[c.nombre] = !!el && normalizar(el.value) === normalizar(c.valor) &&
+                        !el.classList.contains('ng-invalid');
+                });
+                return resultado;
+            """, especificacion)
+        except Exception as e:
+            logger.warning(f"⚠️ Llenado masivo falló, se llenará campo por campo: {e}")
+            return campos
+        
+        pendientes = []
+        for campo in campos:
+            if estado.get(campo['nombre']):
+                logger.info(f"✅ {campo['nombre']} aceptado por Angular")
+            elif not encontrados.get(campo['nombre']) and not campo.get('requerido'):
+                logger.warning(f"⚠️ No se encontró {campo['nombre']}")
+            else:
+                logger.warning(f"⚠️ {campo['nombre']} no quedó válido, reintentando a mano")
+                pendientes.append(campo)
+        
+        return pendientes
+    
+    def _llenar_campo_humano(self, campo):
+        """Llenar un campo de texto simulando tipeo humano (las fechas van por JavaScript)"""
+        nombre = campo['nombre']
+        logger.info(f"{campo['icono']} Llenando {nombre}...")
+        
+        try:
+            if campo['tipo'] == 'fecha':
+                elemento = self._buscar_campo(campo)
+                # Usar JavaScript para campos que no son interactables
+                self.driver.execute_script(f"arguments[0].value = '{campo['valor']}';", elemento)
                 # Disparar evento change para que Angular detecte el cambio
-                self.driver.execute_script("arguments[0].dispatchEvent(new Event('change', { bubbles: true }));", campo_fecha)
+                self.driver.execute_script("arguments[0].dispatchEvent(new Event('change', { bubbles: true }));", elemento)
                 self._espera_humana(0.5, 1, "confirmando fecha")
-                logger.info("✅ Fecha de Nacimiento llenada exitosamente con JavaScript")
-            except:
-                logger.warning("⚠️ No se pudo llenar Fecha de Nacimiento")
-            
-            # Screenshot del formulario completado
-            self.driver.save_screenshot(f"formulario_inicial_completado_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            logger.info("📸 Screenshot del formulario inicial completado")
-            
-            # 7. Click en CONTINUAR - button[value="CONTINUAR"]
-            logger.info("🔘 Haciendo click en CONTINUAR...")
-            try:
-                btn_continuar = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[value='CONTINUAR']")))
-                self._click_humano(btn_continuar)
-                self._espera_humana(4, 8, "cargando página de financiamiento")
-                logger.info("✅ Click en CONTINUAR exitoso")
-            except:
-                logger.error("❌ No se pudo hacer click en CONTINUAR")
-                raise Exception("No se pudo continuar")
-            
-            # ============= CONTINUAR CON EL FLUJO DE FINANCIAMIENTO =============
-            logger.info("💰 Continuando con configuración de financiamiento...")
-            self._configurar_financiamiento_angular(cliente_data)
-            
-            # ============= RESULTADO FINAL =============
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            screenshot_path = f"cliente_final_{agente.replace(' ', '_')}_{nombre.replace(' ', '_')}_{timestamp}.png"
-            self.driver.save_screenshot(screenshot_path)
-            
-            url_resultado = self.driver.current_url
-            
-            resultado_cliente = {
-                'agente': agente,
-                'cliente': nombre,
-                'rut': cliente_data['RUT'],
-                'monto': int(cliente_data['Monto Financiar Original']),
-                'renta_liquida': cliente_data['RENTA LIQUIDA'],
-                'url_resultado': url_resultado,
-                'screenshot': screenshot_path,
-                'timestamp': timestamp,
-                'estado': 'COMPLETADO'
-            }
-            
-            self.actualizar_estado_cliente(cliente_data, "COMPLETADO", f"Exitoso: {url_resultado}")
-            
-            self.clientes_procesados.append(resultado_cliente)
-            logger.info(f"✅ {agente} - Cliente {nombre} procesado exitosamente")
+                logger.info(f"✅ {nombre} llenado exitosamente con JavaScript")
+                return True
             
+            elemento = self._buscar_campo(campo, clickable=campo.get('requerido', False))
+            self._click_humano(elemento)
+            self._tipear_humano(elemento, campo['valor'])
+            logger.info(f"✅ {nombre} llenado exitosamente")
             return True
             
-        except Exception as e:
-            logger.error(f"❌ Error procesando cliente {nombre} ({agente}): {e}")
-            
-            # Tomar screenshot del error para debugging
-            try:
-                error_screenshot = f"error_{agente.replace(' ', '_')}_{nombre.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                self.driver.save_screenshot(error_screenshot)
-                logger.info(f"📸 Screenshot del error: {error_screenshot}")
-            except:
-                pass
-            
-            error_msg = str(e)[:100]
-            self.actualizar_estado_cliente(cliente_data, "ERROR", f"Error: {error_msg}")
-            
-            self.clientes_fallidos.append({
-                'agente': agente,
-                'cliente': nombre,
-                'rut': cliente_data['RUT'],
-                'error': error_msg,
-                'timestamp': datetime.now().isoformat()
-            })
-            
+        except:
+            if campo.get('requerido'):
+                logger.error(f"❌ Error llenando {nombre}")
+                raise Exception(f"No se pudo llenar {nombre}")
+            logger.warning(f"⚠️ No se pudo llenar {nombre}")
             return False
-
-    def _configurar_financiamiento_angular(self, cliente_data):
-        """🔧 CONFIGURACIÓN DE FINANCIAMIENTO CON SELECTORES ANGULAR CORREGIDOS"""
-        logger.info("💰 INICIANDO CONFIGURACIÓN ANGULAR CORREGIDA...")
+    
+    def _llenar_campo_monto(self, campo):
+        """Campo form-money-amount: valor por JavaScript y los eventos que escucha Angular"""
+        nombre = campo['nombre']
+        logger.info(f"{campo['icono']} Llenando {nombre} (Componente Angular)...")
         
         try:
-            # ============= PÁGINA 2: CONFIGURACIÓN DE FINANCIAMIENTO =============
-            logger.info("📄 PÁGINA 2: Configuración de Financiamiento Angular")
-            
-            # ESPERA EXTENDIDA PARA ANGULAR
-            logger.info("⏳ Esperando carga completa de Angular...")
-            self._espera_humana(5, 8, "cargando página de financiamiento completamente")
+            elemento = self._buscar_campo(campo)
+            self._click_humano(elemento)
+            self.driver.execute_script("""
+                var element = arguments[0];
+                element.value = arguments[1];
+                element.dispatchEvent(new Event('input', { bubbles: true }));
+                element.dispatchEvent(new Event('change', { bubbles: true }));
+                element.dispatchEvent(new Event('blur', { bubbles: true }));
+            """, elemento, campo['valor'])
+            logger.info(f"✅ {nombre} llenado: {campo['valor']}")
+            return True
             
-            # DEBUG: Información de la página actual
-            try:
-                url_actual = self.driver.current_url
-                titulo_actual = self.driver.title
-                logger.info(f"📍 URL actual: {url_actual}")
-                logger.info(f"📄 Título actual: {titulo_actual}")
-                
-                # Verificar si hay elementos Angular cargando
-                elementos_ng = self.driver.find_elements(By.CSS_SELECTOR, "[ng-reflect], [_ngcontent]")
-                logger.info(f"🅰️ Elementos Angular detectados: {len(elementos_ng)}")
-                
-                # Verificar selects disponibles
-                selects_totales = self.driver.find_elements(By.CSS_SELECTOR, "select")
-                logger.info(f"📋 Total selects en página: {len(selects_totales)}")
-                
-            except Exception as debug_error:
-                logger.warning(f"Error en debug inicial: {debug_error}")
+        except Exception as e:
+            if campo.get('requerido'):
+                logger.error(f"❌ Error llenando {nombre} Angular: {e}")
+                raise Exception(f"No se pudo llenar {nombre}")
+            logger.warning(f"⚠️ No se pudo llenar {nombre}: {e}")
+            return False
+    
+    def _elegir_select(self, criterio):
+        """Select de la consulta de página por posición o por sus opciones (contiene / alguna_de / excluye)"""
+        selects = self._consultar_pagina()['selects']
+        if 'posicion' in criterio:
+            return selects[criterio['posicion']] if criterio['posicion'] < len(selects) else None
+        
+        for select_info in selects:
+            textos = [opcion['texto'] for opcion in select_info['opciones'] if opcion['texto']]
+            minusculas = [texto.lower() for texto in textos]
+            logger.info(f"📋 Select {select_info['posicion']}: {textos}")
+            if criterio.get('contiene') and not any(criterio['contiene'] in texto for texto in minusculas):
+                continue
+            if criterio.get('alguna_de') and not any(texto in criterio['alguna_de'] for texto in textos):
+                continue
+            if any(excluido in texto for excluido in criterio.get('excluye', []) for texto in minusculas):
+                continue
+            return select_info
+        return None
+    
+    def _llenar_campo_select(self, campo):
+        """Elegir el select del campo y la primera de sus 'opciones' (texto, valor o índice) que exista"""
+        nombre = campo['nombre']
+        logger.info(f"{campo['icono']} Seleccionando {nombre}...")
+        
+        try:
+            self._buscar("select", requerido=campo.get('requerido', False))
+            select_info = self._elegir_select(campo['select'])
+            if select_info is None:
+                raise NoSuchElementException(f"No hay select para {nombre}")
+            
+            for criterio in campo['opciones']:
+                elegido = self._seleccionar_opcion(select_info['posicion'], **criterio)
+                if elegido:
+                    logger.info(f"✅ {nombre} seleccionado: {elegido} (select {select_info['posicion']}, {criterio})")
+                    return True
+            raise NoSuchElementException(f"Ninguna opción de {nombre} disponible")
             
-            # SCREENSHOT ANTES DE INTENTAR SELECCIÓN
-            self.driver.save_screenshot(f"antes_seleccion_producto_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            logger.info("📸 Screenshot antes de selección de producto")
+        except Exception as e:
+            if campo.get('requerido'):
+                logger.error(f"❌ Error seleccionando {nombre}: {e}")
+                raise Exception(f"No se pudo seleccionar {nombre}")
+            logger.warning(f"⚠️ No se pudo seleccionar {nombre}: {e}")
+            return False
+    
+    def _llenar_campo_producto(self, campo):
+        """¿Qué se va a financiar? con las estrategias adaptativas; si ninguna sirve, selects a la bitácora"""
+        if self._seleccionar_producto_adaptativo(campo['valor']):
+            return True
+        
+        logger.error("❌ No se pudo seleccionar producto con ninguna estrategia")
+        
+        # DEBUG COMPLETO: selects y form-selects en una sola instantánea (queda en la bitácora)
+        instantanea = self._instantanea_dom("producto sin seleccionar")
+        if instantanea:
+            selects = [c for c in instantanea['campos'] if c['tag'] == 'select']
+            logger.info(f"📋 Total selects encontrados: {len(selects)}")
+            for i, select_info in enumerate(selects):
+                logger.info(f"📋 Select {i} - Clases: {select_info['clases']} - Opciones: {select_info['opciones']}")
+            for i, label in enumerate(instantanea['form_selects']):
+                logger.info(f"📋 Form-select {i} - Label: {label}")
+        
+        self._capturar('error_select_all_strategies', error=True)
+        raise Exception("No se pudo seleccionar producto después de 4 estrategias específicas")
+    
+
+    def procesar_cliente_individual(self, cliente_data):
+        """Procesar un cliente individual en Salvum recorriendo PASOS_FLUJO"""
+        nombre = cliente_data['Nombre Cliente']
+        agente = cliente_data['agente']
+        
+        logger.info(f"👤 Procesando: {nombre} ({agente})")
+        
+        # Dict nuevo por cliente: el reporte de cada cliente guarda su propia referencia
+        self._tiempos_cliente = {}
+        self.capturas.descartar()
+        self.bitacora_dom.descartar()
+        
+        try:
+            self.actualizar_estado_cliente(cliente_data, "PROCESANDO")
+            self._ejecutar_flujo(cliente_data)
+            logger.info(f"✅ {agente} - Cliente {nombre} procesado exitosamente")
+            return True
             
-            # 1. ¿Qué se va a financiar? → Seleccionar "Casas modulares"
-            logger.info("🏠 Seleccionando: Casas modulares (Selectores precisos del DevTools)")
-            try:
-                producto_seleccionado = False
-                
-                # ESTRATEGIA 1: Usar el componente form-select específico
-                logger.info("🔍 Estrategia 1: Componente form-select...")
+        except SesionExpiradaError:
+            raise
+        except Exception as e:
+            # Los pasos envuelven sus errores; si la causa real es el logout, que lo maneje el turno
+            if self._sesion_expirada():
+                raise SesionExpiradaError(f"Login visible tras error: {e}") from e
+            
+            logger.error(f"❌ Error procesando cliente {nombre} ({agente}): {e}")
+            self._registrar_fallo_cliente(cliente_data, e)
+            return False
+    
+    def _pasos_flujo(self):
+        """PASOS_FLUJO con los ajustes por paso de config 'flujo_pasos'"""
+        ajustes = self.config.get('flujo_pasos', {})
+        return [dict(paso, **ajustes.get(paso['nombre'], {})) for paso in PASOS_FLUJO]
+    
+    def _contexto_flujo(self, cliente_data):
+        """Datos del cliente disponibles para las plantillas 'valor' de los campos"""
+        nombre_partes = cliente_data['Nombre Cliente'].split()
+        return {
+            'rut': cliente_data['RUT'],
+            'telefono': cliente_data['Telefono'],
+            'email': cliente_data['Email'],
+            'primer_nombre': nombre_partes[0] if nombre_partes else cliente_data['Nombre Cliente'],
+            'monto': int(cliente_data['Monto Financiar Original']),
+            'renta_liquida': int(cliente_data['RENTA LIQUIDA']),
+        }
+    
+    def _reanudacion_flujo(self, cliente_data, pasos):
+        """Índice del primer paso a ejecutar: después del último paso reanudable que el diario ya tiene"""
+        hecho = self.diario.ultimo_paso(cliente_data)
+        if hecho not in PASOS_DIARIO or hecho in ('iniciado', 'error'):
+            return 0
+        
+        desde = 0
+        for i, paso in enumerate(pasos):
+            if paso.get('reanudable') and PASOS_DIARIO.index(paso['diario']) <= PASOS_DIARIO.index(hecho):
+                desde = i + 1
+        return desde
+    
+    def _ejecutar_flujo(self, cliente_data):
+        """Recorrer los pasos del flujo en orden (ver PASOS_FLUJO)"""
+        pasos = self._pasos_flujo()
+        contexto = self._contexto_flujo(cliente_data)
+        
+        desde = self._reanudacion_flujo(cliente_data, pasos)
+        self._flujo_reanudado = desde > 0
+        if desde:
+            logger.info(f"⏭️ Diario: pasos hasta '{pasos[desde - 1]['nombre']}' ya hechos, se retoma en '{pasos[desde]['nombre']}'")
+        else:
+            self.diario.registrar(cliente_data, 'iniciado')
+        
+        for paso in pasos[desde:]:
+            self._ejecutar_paso(paso, cliente_data, contexto)
+    
+    def _acotar_al_paso(self, timeout):
+        """Recortar una espera a lo que le queda al paso en curso (timeout_seg)"""
+        if self._limite_paso is None:
+            return timeout
+        return max(0, min(timeout, self._limite_paso - time.monotonic()))
+    
+    def _verificar_limite_paso(self, motivo):
+        """Cortar el paso en curso si ya pasó su timeout_seg (TimeoutException: error transitorio)"""
+        if self._limite_paso is not None and time.monotonic() >= self._limite_paso:
+            raise TimeoutException(f"Paso sin tiempo (timeout_seg agotado): {motivo}")
+    
+    def _ejecutar_paso(self, paso, cliente_data, contexto):
+        """Un paso cronometrado con su timeout; los errores transitorios se reintentan aquí mismo con backoff.
+        
+        Un error permanente o los reintentos agotados cortan el flujo si el paso es requerido;
+        si es opcional se sigue con el siguiente.
+        """
+        nombre = paso['nombre']
+        reintentos = paso.get('reintentos', self._leer_opcion('reintentos_transitorios', 'SALVUM_REINTENTOS_TRANSITORIOS', 2))
+        timeout = paso.get('timeout_seg', self._leer_opcion('timeout_paso_seg', 'SALVUM_TIMEOUT_PASO', 120))
+        
+        self._progreso_paso = {}
+        with self._cronometrar(nombre):
+            for intento in range(reintentos + 1):
+                self._limite_paso = time.monotonic() + timeout
                 try:
-                    # Buscar el componente form-select por su label
-                    form_select = self.driver.find_element(
-                        By.CSS_SELECTOR, 
-                        "form-select[label='¿Qué se va a financiar?']"
-                    )
-                    logger.info("✅ Componente form-select encontrado")
-                    
-                    # Buscar el select interno con las clases específicas del DevTools
-                    select_interno = form_select.find_element(
-                        By.CSS_SELECTOR, 
-                        "select.ng-pristine.ng-invalid.ng-touched"
-                    )
-                    
-                    if select_interno.is_displayed():
-                        select_obj = Select(select_interno)
-                        opciones = [opt.text.strip() for opt in select_obj.options]
-                        logger.info(f"📋 Opciones en form-select: {opciones}")
-                        
-                        if "Casas modulares" in opciones:
-                            select_obj.select_by_visible_text("Casas modulares")
-                            logger.info("✅ Producto seleccionado con form-select: Casas modulares")
-                            producto_seleccionado = True
-                    
+                    self._correr_paso(paso, cliente_data, contexto)
+                    return
+                except SesionExpiradaError:
+                    raise
                 except Exception as e:
-                    logger.warning(f"Estrategia 1 falló: {e}")
-                
-                # ESTRATEGIA 2: Buscar por div.combo-cont.is-focus específico
-                if not producto_seleccionado:
-                    logger.info("🔍 Estrategia 2: div.combo-cont.is-focus...")
-                    try:
-                        combo_container = self.driver.find_element(
-                            By.CSS_SELECTOR, 
-                            "div.combo-cont.is-focus.normal-border"
-                        )
-                        logger.info("✅ Combo container específico encontrado")
-                        
-                        # Hacer click para activar si es necesario
-                        self._click_humano(combo_container)
-                        self._espera_humana(1, 2, "activando combo específico")
-                        
-                        # Buscar el select dentro del combo
-                        select_combo = combo_container.find_element(By.CSS_SELECTOR, "select")
-                        select_obj = Select(select_combo)
-                        opciones = [opt.text.strip() for opt in select_obj.options]
-                        logger.info(f"📋 Opciones en combo-cont: {opciones}")
-                        
-                        if "Casas modulares" in opciones:
-                            select_obj.select_by_visible_text("Casas modulares")
-                            logger.info("✅ Producto seleccionado con combo-cont: Casas modulares")
-                            producto_seleccionado = True
-                    
-                    except Exception as e:
-                        logger.warning(f"Estrategia 2 falló: {e}")
+                    causa = e
+                    error = self._clasificar_error(e)
+                    if isinstance(error, NavegadorCaidoError):
+                        raise error from e
+                finally:
+                    self._limite_paso = None
                 
-                # ESTRATEGIA 3: Buscar select por clases exactas del DevTools
-                if not producto_seleccionado:
-                    logger.info("🔍 Estrategia 3: Clases exactas del DevTools...")
-                    try:
-                        select_exacto = self.driver.find_element(
-                            By.CSS_SELECTOR, 
-                            "select.ng-pristine.ng-invalid.ng-touched"
-                        )
-                        
-                        if select_exacto.is_displayed() and select_exacto.is_enabled():
-                            select_obj = Select(select_exacto)
-                            opciones = [opt.text.strip() for opt in select_obj.options]
-                            logger.info(f"📋 Opciones en select exacto: {opciones}")
-                            
-                            if "Casas modulares" in opciones:
-                                select_obj.select_by_visible_text("Casas modulares")
-                                logger.info("✅ Producto seleccionado con clases exactas: Casas modulares")
-                                producto_seleccionado = True
-                            else:
-                                # Intentar por valor como fallback
-                                try:
-                                    select_obj.select_by_value("2: Object")
-                                    logger.info("✅ Producto seleccionado por valor: 2: Object")
-                                    producto_seleccionado = True
-                                except:
-                                    pass
-                    
-                    except Exception as e:
-                        logger.warning(f"Estrategia 3 falló: {e}")
-                
-                # ESTRATEGIA 4: Click en la opción p.option-selected para activar
-                if not producto_seleccionado:
-                    logger.info("🔍 Estrategia 4: Click en option-selected...")
-                    try:
-                        # Buscar el elemento p.option-selected
-                        option_selected = self.driver.find_element(
-                            By.CSS_SELECTOR, 
-                            "p.option-selected"
-                        )
-                        logger.info("✅ Element option-selected encontrado")
-                        
-                        # Hacer click para abrir el dropdown
-                        self._click_humano(option_selected)
-                        self._espera_humana(1, 2, "abriendo dropdown con option-selected")
-                        
-                        # Ahora intentar seleccionar en el select que se activó
-                        selects_activos = self.driver.find_elements(By.CSS_SELECTOR, "select")
-                        for select_elem in selects_activos:
-                            try:
-                                select_obj = Select(select_elem)
-                                opciones = [opt.text.strip() for opt in select_obj.options]
-                                if "Casas modulares" in opciones:
-                                    select_obj.select_by_visible_text("Casas modulares")
-                                    logger.info("✅ Producto seleccionado después de option-selected: Casas modulares")
-                                    producto_seleccionado = True
-                                    break
-                            except:
-                                continue
-                    
-                    except Exception as e:
-                        logger.warning(f"Estrategia 4 falló: {e}")
-                
-                if not producto_seleccionado:
-                    logger.error("❌ No se pudo seleccionar producto con ninguna estrategia")
-                    
-                    # DEBUG COMPLETO: Mostrar todos los elementos disponibles
-                    try:
-                        logger.info("🔍 DEBUG: Analizando elementos disponibles...")
-                        
-                        # Todos los selects
-                        todos_selects = self.driver.find_elements(By.CSS_SELECTOR, "select")
-                        logger.info(f"📋 Total selects encontrados: {len(todos_selects)}")
-                        
-                        for i, select_elem in enumerate(todos_selects):
-                            try:
-                                clases = select_elem.get_attribute("class")
-                                select_obj = Select(select_elem)
-                                opciones = [opt.text.strip() for opt in select_obj.options]
-                                logger.info(f"📋 Select {i} - Clases: {clases} - Opciones: {opciones}")
-                            except Exception as debug_error:
-                                logger.warning(f"Error debuggeando select {i}: {debug_error}")
-                        
-                        # Todos los form-select
-                        form_selects = self.driver.find_elements(By.CSS_SELECTOR, "form-select")
-                        logger.info(f"📋 Total form-selects: {len(form_selects)}")
-                        
-                        for i, fs in enumerate(form_selects):
-                            try:
-                                label = fs.get_attribute("label")
-                                logger.info(f"📋 Form-select {i} - Label: {label}")
-                            except:
-                                pass
-                                
-                    except Exception as debug_error:
-                        logger.warning(f"Error en debug completo: {debug_error}")
-                    
-                    self.driver.save_screenshot(f"error_select_all_strategies_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-                    raise Exception("No se pudo seleccionar producto después de 4 estrategias específicas")
-                
-                self._espera_humana(3, 5, "esperando que se carguen opciones dependientes")
+                if not isinstance(error, ErrorTransitorio) or intento == reintentos:
+                    break
+                logger.warning(f"🔁 Paso {nombre}: error transitorio ({error}), reintento {intento + 1}/{reintentos}")
+                self.reintentos_pasos[nombre] = self.reintentos_pasos.get(nombre, 0) + 1
+                self.metricas.incrementar('pasos_reintentos', paso=nombre)
+                self._espera_backoff(intento)
+            
+            if paso.get('captura_error'):
+                self._capturar(paso['captura_error'], error=True)
+            if isinstance(error, ErrorTransitorio) and reintentos:
+                error = ErrorTransitorio(f"{error} (agotados {reintentos} reintentos)")
+            if paso.get('requerido', True):
+                logger.error(f"❌ Paso {nombre} falló ({type(error).__name__}): {error}")
+                raise type(error)(f"{paso.get('error', f'Error en paso {nombre}')}: {error}") from causa
+            logger.warning(f"⚠️ Paso {nombre} no completado, continuando: {error}")
+    
+    def _clasificar_error(self, error):
+        """ErrorTransitorio o ErrorPermanente según el error y su cadena de causas.
+        
+        Si el portal muestra mensajes de validación o rechazo es permanente aunque la causa
+        inmediata sea un timeout (la página no avanzó porque el portal no la aceptó).
+        Lo que no se reconoce como transitorio se trata como permanente: no se reintenta a ciegas.
+        Un driver caído devuelve NavegadorCaidoError (no se reintenta el paso, se reinicia el navegador).
+        """
+        if isinstance(error, (ErrorTransitorio, ErrorPermanente)):
+            return error
+        
+        causa = error
+        while causa is not None:
+            if any(mensaje in str(causa).lower() for mensaje in MENSAJES_NAVEGADOR_CAIDO):
+                return NavegadorCaidoError(str(error))
+            causa = causa.__cause__ or causa.__context__
+        
+        errores_portal = self._errores_portal()
+        if errores_portal:
+            return ErrorPermanente(f"{error} - portal: {'; '.join(errores_portal)}")
+        
+        causa = error
+        while causa is not None:
+            if isinstance(causa, ErrorTransitorio) or isinstance(causa, EXCEPCIONES_TRANSITORIAS):
+                return ErrorTransitorio(str(error))
+            if any(mensaje in str(causa).lower() for mensaje in MENSAJES_TRANSITORIOS):
+                return ErrorTransitorio(str(error))
+            causa = causa.__cause__ or causa.__context__
+        return ErrorPermanente(str(error))
+    
+    def _errores_portal(self):
+        """Mensajes de error/validación visibles en el portal (lista vacía si no hay o no se pudo leer)"""
+        try:
+            return self.driver.execute_script(SCRIPT_ERRORES_PORTAL) or []
+        except Exception:
+            return []
+    
+    def _espera_backoff(self, intento):
+        """Backoff exponencial acotado (backoff_base_seg * 2^intento, tope backoff_max_seg) con jitter"""
+        import random
+        base = self._leer_opcion('backoff_base_seg', 'SALVUM_BACKOFF_BASE', 1.0)
+        maximo = self._leer_opcion('backoff_max_seg', 'SALVUM_BACKOFF_MAX', 8.0)
+        pausa = min(maximo, base * 2 ** intento) * random.uniform(0.5, 1.0)
+        logger.info(f"⏳ Backoff de {pausa:.1f}s antes de reintentar")
+        time.sleep(pausa)
+    
+    def _correr_paso(self, paso, cliente_data, contexto):
+        """Espera previa, campos, acción, captura, botón para avanzar y registro en el diario.
+        
+        En un reintento no se repite lo que ya se clickeó (ver _progreso_paso): si el botón para
+        avanzar ya pasó, el navegador está en la página siguiente y solo queda esperarla.
+        """
+        if paso.get('titulo'):
+            logger.info(paso['titulo'])
+        
+        continuar = paso.get('continuar')
+        if self._progreso_paso.get('avanzado'):
+            logger.info(f"↪️ Paso {paso['nombre']}: ya se avanzó de página, solo se espera que cargue")
+            self._esperar_pagina_lista(continuar['motivo'], **continuar.get('listo', {}))
+        else:
+            if 'listo' in paso:
+                self._esperar_pagina_lista(paso['motivo'], **paso['listo'])
+            
+            if self._progreso_paso.get('accion'):
+                logger.info(f"↪️ Paso {paso['nombre']}: acción {paso['accion']} ya ejecutada, no se repite")
+            else:
+                if paso.get('campos'):
+                    self._llenar_campos_flujo(paso['campos'], contexto, masivo=paso.get('llenado_masivo', False))
                 
-            except Exception as e:
-                logger.error(f"❌ Error crítico seleccionando producto Angular: {e}")
-                self.driver.save_screenshot(f"error_select_angular_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-                raise Exception("No se pudo seleccionar producto en componente Angular")
-            
-            # 2. Valor del producto → NUEVO SELECTOR BASADO EN HTML REAL
-            logger.info("💰 Llenando Valor del producto (Componente Angular)...")
+                if paso.get('accion'):
+                    self._verificar_limite_paso(f"acción {paso['accion']}")
+                    self._acciones_flujo()[paso['accion']](cliente_data)
+                    self._progreso_paso['accion'] = True
+            
+            if paso.get('captura'):
+                self._capturar(paso['captura'])
+            
+            if continuar:
+                self._verificar_limite_paso(f"continuar {paso['nombre']}")
+                if not self._continuar_flujo(continuar):
+                    return
+        
+        if paso.get('diario'):
+            self.diario.registrar(cliente_data, paso['diario'])
+        logger.info(f"✅ Paso {paso['nombre']} completado")
+    
+    def _acciones_flujo(self):
+        return {
+            'ir_a_solicitudes': self._accion_ir_a_solicitudes,
+            'resumen_pagina': self._accion_resumen_pagina,
+            'simular': self._accion_simular,
+            'registrar_resultado': self._accion_registrar_resultado,
+        }
+    
+    def _continuar_flujo(self, continuar):
+        """Click en el botón del paso (si tiene) y esperar la página siguiente.
+        
+        Devuelve False si un botón opcional no apareció (el paso no se da por hecho).
+        """
+        if continuar.get('selector'):
+            logger.info(f"🔘 Haciendo click en {continuar['selector']}...")
             try:
-                monto = int(cliente_data['Monto Financiar Original'])
-                logger.info(f"💵 Monto a usar: {monto}")
-                
-                # NUEVO: Buscar dentro del componente form-money-amount
-                campo_valor = self.driver.find_element(
-                    By.CSS_SELECTOR, 
-                    "form-money-amount[label='Valor del producto'] input[id='import-simple']"
-                )
-                
-                logger.info("✅ Campo valor encontrado en componente Angular")
-                
-                # Hacer click y enfocar el campo
-                self._click_humano(campo_valor)
-                
-                # Limpiar y llenar usando JavaScript para asegurar compatibilidad con Angular
-                self.driver.execute_script("arguments[0].value = '';", campo_valor)
-                self.driver.execute_script(f"arguments[0].value = '{monto}';", campo_valor)
-                
-                # Disparar eventos Angular
-                self.driver.execute_script("""
-                    var element = arguments[0];
-                    element.dispatchEvent(new Event('input', { bubbles: true }));
-                    element.dispatchEvent(new Event('change', { bubbles: true }));
-                    element.dispatchEvent(new Event('blur', { bubbles: true }));
-                """, campo_valor)
-                
-                logger.info(f"✅ Valor del producto llenado: {monto}")
-                self._espera_humana(2, 4, "esperando procesamiento Angular del valor")
-                
-            except Exception as e:
-                logger.error(f"❌ Error llenando Valor del producto Angular: {e}")
-                self.driver.save_screenshot(f"error_valor_angular_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-                raise Exception("No se pudo llenar valor del producto en componente Angular")
-            
-            # 3. ¿Cuánto quieres solicitar? → NUEVO SELECTOR ESPECÍFICO
-            logger.info("💵 Llenando Cuánto quieres solicitar (Componente Angular)...")
+                boton = self._buscar(continuar['selector'], clickable=True)
+            except NoSuchElementException:
+                if continuar.get('requerido', True):
+                    raise
+                logger.warning(f"⚠️ No se encontró {continuar['selector']}, continuando...")
+                return False
+            self._click_humano(boton)
+            self._progreso_paso['avanzado'] = True
+        
+        self._esperar_pagina_lista(continuar['motivo'], **continuar.get('listo', {}))
+        return True
+    
+    def _llenar_campos_flujo(self, campos, contexto, masivo=False):
+        """Llenar los campos de un paso en orden; con masivo, texto y fechas van primero en un solo round trip"""
+        campos = [dict(campo, valor=str(campo['valor']).format(**contexto)) if 'valor' in campo else campo
+                  for campo in campos]
+        
+        pendientes = campos
+        if masivo and self._usar_llenado_masivo():
+            rapidos = [campo for campo in campos if campo['tipo'] in ('texto', 'fecha')]
+            pendientes = self._llenar_formulario_masivo(rapidos) + [campo for campo in campos if campo not in rapidos]
+        
+        llenadores = {
+            'texto': self._llenar_campo_humano,
+            'fecha': self._llenar_campo_humano,
+            'monto': self._llenar_campo_monto,
+            'select': self._llenar_campo_select,
+            'producto': self._llenar_campo_producto,
+        }
+        for campo in pendientes:
+            self._verificar_limite_paso(f"campo {campo['nombre']}")
+            if llenadores[campo['tipo']](campo) and 'listo' in campo:
+                self._esperar_pagina_lista(f"después de {campo['nombre']}", **campo['listo'])
+    
+    def _buscar_campo(self, campo, clickable=False):
+        """Elemento de un campo: su selector con el presupuesto normal y luego los alternativos sin esperar"""
+        selectores = [campo['selector']] + campo.get('alternativos', [])
+        for i, selector in enumerate(selectores):
             try:
-                # NUEVO: Buscar el segundo componente form-money-amount
-                campo_solicitar = self.driver.find_element(
-                    By.CSS_SELECTOR, 
-                    "form-money-amount[label='¿Cuánto quieres solicitar?'] input[id='import-simple']"
-                )
-                
-                logger.info("✅ Campo solicitar encontrado en componente Angular")
-                
-                # Hacer click y enfocar el campo
-                self._click_humano(campo_solicitar)
-                
-                # Limpiar y llenar usando JavaScript
-                self.driver.execute_script("arguments[0].value = '';", campo_solicitar)
-                self.driver.execute_script(f"arguments[0].value = '{monto}';", campo_solicitar)
-                
-                # Disparar eventos Angular
-                self.driver.execute_script("""
-                    var element = arguments[0];
-                    element.dispatchEvent(new Event('input', { bubbles: true }));
-                    element.dispatchEvent(new Event('change', { bubbles: true }));
-                    element.dispatchEvent(new Event('blur', { bubbles: true }));
-                """, campo_solicitar)
+                return self._buscar(selector, requerido=campo.get('requerido', False), clickable=clickable,
+                                    timeout=0 if i else None)
+            except NoSuchElementException:
+                if i == len(selectores) - 1:
+                    raise
+                logger.info(f"🔎 Probando selector alternativo para {campo['nombre']}...")
+    
+
+    def _registrar_fallo_cliente(self, cliente_data, error):
+        """Screenshot, ERROR en la planilla y registro en clientes_fallidos.
+        
+        Solo llegan aquí errores permanentes o transitorios con los reintentos del paso agotados.
+        """
+        nombre = cliente_data['Nombre Cliente']
+        agente = cliente_data['agente']
+        
+        # Captura del error (vuelca también las retenidas del cliente) y bitácora DOM
+        self._capturar(f"error_{agente.replace(' ', '_')}_{nombre.replace(' ', '_')}", error=True)
+        self._volcar_diagnostico(f"{agente.replace(' ', '_')}_{nombre.replace(' ', '_')}")
+        
+        clase = 'transitorio' if isinstance(error, ErrorTransitorio) else 'permanente'
+        error_msg = str(error)[:100]
+        self.actualizar_estado_cliente(cliente_data, "ERROR", f"Error {clase}: {error_msg}")
+        self.diario.registrar(cliente_data, 'error', error=error_msg, clase=clase)
+        self.metricas.incrementar('clientes_fallidos_clase', clase=clase)
+        
+        self.clientes_fallidos.append({
+            'agente': agente,
+            'cliente': nombre,
+            'rut': cliente_data['RUT'],
+            'error': error_msg,
+            'clase_error': clase,
+            'timestamp': datetime.now().isoformat(),
+            'tiempos_pasos': self._tiempos_cliente
+        })
+
+    def _seleccionar_producto_adaptativo(self, producto):
+        """Probar las estrategias de selección de producto, primero las que mejor vienen funcionando.
+        
+        Cada intento tiene su propio presupuesto de tiempo explícito y el resultado se registra en las estadísticas persistidas.
+        """
+        estrategias = {
+            'form_select': self._estrategia_producto_form_select,
+            'combo_cont': self._estrategia_producto_combo_cont,
+            'clases_exactas': self._estrategia_producto_clases_exactas,
+            'option_selected': self._estrategia_producto_option_selected,
+        }
+        presupuesto = self._leer_opcion('presupuesto_estrategia_seg', 'SALVUM_PRESUPUESTO_ESTRATEGIA', 5)
+        orden = self.estadisticas_selectores.ordenar('producto', list(estrategias))
+        logger.info(f"🧠 Orden de estrategias según historial: {orden}")
+        
+        seleccionado = False
+        try:
+            for nombre in orden:
+                logger.info(f"🔍 Estrategia {nombre} (presupuesto {presupuesto}s)...")
+                inicio = time.monotonic()
+                selector = None
+                try:
+                    selector = estrategias[nombre](producto, presupuesto)
+                except Exception as e:
+                    logger.warning(f"Estrategia {nombre} falló: {e}")
                 
-                logger.info(f"✅ Cuánto solicitar llenado: {monto}")
-                self._espera_humana(2, 4, "esperando procesamiento Angular del monto solicitar")
+                self.estadisticas_selectores.registrar('producto', nombre, bool(selector), selector)
+                logger.info(f"⏱️ Estrategia {nombre}: {'éxito' if selector else 'sin éxito'} en {time.monotonic() - inicio:.1f}s")
                 
-            except Exception as e:
-                logger.warning(f"⚠️ Error llenando Cuánto solicitar: {e}")
-                # No es crítico si falla, a veces solo hay un campo
-                logger.info("ℹ️ Continuando sin segundo campo de monto")
-            
-            # ESPERAR A QUE SE CARGUEN LOS SELECTS DINÁMICOS
-            logger.info("⏳ Esperando que se carguen las opciones dinámicas...")
-            self._espera_humana(4, 7, "esperando carga dinámica de selects Angular")
-            
-            # 4. Cuota → Buscar selects que se cargaron dinámicamente
-            logger.info("📊 Seleccionando Cuota: 60 cuotas (Angular dinámico)")
+                if selector:
+                    seleccionado = True
+                    break
+        finally:
+            self.estadisticas_selectores.guardar()
+        
+        return seleccionado
+    
+    def _estrategia_producto_form_select(self, producto, presupuesto):
+        """Componente form-select específico (selectores del DevTools)"""
+        selector = "form-select[label='¿Qué se va a financiar?']"
+        self._buscar(selector, timeout=presupuesto)
+        logger.info("✅ Componente form-select encontrado")
+        
+        # El select interno con las clases específicas del DevTools, elegido desde la consulta de página
+        for select_info in self._consultar_pagina()['selects']:
+            if (select_info['label'] != '¿Qué se va a financiar?' or not select_info['visible'] or
+                    not {'ng-pristine', 'ng-invalid', 'ng-touched'} <= set(select_info['clases'].split())):
+                continue
+            opciones = [opcion['texto'] for opcion in select_info['opciones']]
+            logger.info(f"📋 Opciones en form-select: {opciones}")
+            
+            if producto in opciones and self._seleccionar_opcion(select_info['posicion'], texto=producto):
+                logger.info(f"✅ Producto seleccionado con form-select: {producto}")
+                return f"{selector} select"
+            break
+        return None
+    
+    def _estrategia_producto_combo_cont(self, producto, presupuesto):
+        """div.combo-cont.is-focus específico"""
+        selector = "div.combo-cont.is-focus.normal-border"
+        combo_container = self._buscar(selector, timeout=presupuesto)
+        logger.info("✅ Combo container específico encontrado")
+        
+        # Hacer click para activar si es necesario
+        self._click_humano(combo_container)
+        self._espera_humana(1, 2, "activando combo específico")
+        
+        # Buscar el select dentro del combo
+        select_combo = combo_container.find_element(By.CSS_SELECTOR, "select")
+        select_obj = Select(select_combo)
+        opciones = [opt.text.strip() for opt in select_obj.options]
+        logger.info(f"📋 Opciones en combo-cont: {opciones}")
+        
+        if producto in opciones:
+            select_obj.select_by_visible_text(producto)
+            logger.info(f"✅ Producto seleccionado con combo-cont: {producto}")
+            return f"{selector} select"
+        return None
+    
+    def _estrategia_producto_clases_exactas(self, producto, presupuesto):
+        """Select por clases exactas del DevTools"""
+        selector = "select.ng-pristine.ng-invalid.ng-touched"
+        self._buscar(selector, timeout=presupuesto)
+        
+        for select_info in self._consultar_pagina()['selects']:
+            if not {'ng-pristine', 'ng-invalid', 'ng-touched'} <= set(select_info['clases'].split()):
+                continue
+            if not (select_info['visible'] and select_info['habilitado']):
+                break
+            opciones = [opcion['texto'] for opcion in select_info['opciones']]
+            logger.info(f"📋 Opciones en select exacto: {opciones}")
+            
+            if producto in opciones and self._seleccionar_opcion(select_info['posicion'], texto=producto):
+                logger.info(f"✅ Producto seleccionado con clases exactas: {producto}")
+                return selector
+            
+            # Intentar por valor como fallback
+            if self._seleccionar_opcion(select_info['posicion'], valor="2: Object"):
+                logger.info("✅ Producto seleccionado por valor: 2: Object")
+                return f"{selector} [value='2: Object']"
+            break
+        return None
+    
+    def _estrategia_producto_option_selected(self, producto, presupuesto):
+        """Click en p.option-selected para abrir el dropdown y luego elegir en el select activo"""
+        selector = "p.option-selected"
+        option_selected = self._buscar(selector, timeout=presupuesto)
+        logger.info("✅ Element option-selected encontrado")
+        
+        # Hacer click para abrir el dropdown
+        self._click_humano(option_selected)
+        self._espera_humana(1, 2, "abriendo dropdown con option-selected")
+        
+        # Ahora intentar seleccionar en el select que se activó
+        for select_info in self._consultar_pagina()['selects']:
+            if any(opcion['texto'] == producto for opcion in select_info['opciones']):
+                if self._seleccionar_opcion(select_info['posicion'], texto=producto):
+                    logger.info(f"✅ Producto seleccionado después de option-selected: {producto}")
+                    return f"{selector} + select[{select_info['posicion']}]"
+        return None
+    
+    def _accion_ir_a_solicitudes(self, cliente_data):
+        """Si no estamos en credit-request, navegar primero"""
+        url_actual = self.driver.current_url
+        logger.info(f"📍 URL actual: {url_actual}")
+        
+        if "credit-request" not in url_actual.lower():
+            logger.info("🔄 Navegando a página de solicitudes...")
+            self.driver.get(f"{URL_SALVUM}/credit-request")
+            self._esperar_pagina_lista("cargando página de solicitudes", selector="button[value='NUEVA SOLICITUD']")
+    
+    def _accion_resumen_pagina(self, cliente_data):
+        """DEBUG: información de la página actual (de la instantánea que tomó la espera)"""
+        instantanea = self.bitacora_dom.ultima()
+        if instantanea:
+            logger.info(f"📍 URL actual: {instantanea['url']}")
+            logger.info(f"📄 Título actual: {instantanea['titulo']}")
+            logger.info(f"📋 Total selects en página: {sum(1 for c in instantanea['campos'] if c['tag'] == 'select')}")
+    
+    def _accion_simular(self, cliente_data):
+        """Esperar a que SIMULAR se habilite y clickearlo; si nunca se habilita, forzarlo por JavaScript"""
+        boton_encontrado = False
+        for intento in range(25):
+            if self._acotar_al_paso(1) <= 0:
+                break
             try:
-                # Esperar un poco más para que Angular termine de cargar
-                self._espera_humana(3, 5, "esperando finalización carga Angular")
-                
-                # Buscar todos los selects disponibles después de llenar montos
-                selects_disponibles = self.driver.find_elements(By.CSS_SELECTOR, "select")
-                logger.info(f"📋 Selects disponibles después de llenar montos: {len(selects_disponibles)}")
-                
-                cuota_seleccionada = False
-                for i, select_elem in enumerate(selects_disponibles):
-                    try:
-                        select_obj = Select(select_elem)
-                        opciones = [option.text.strip() for option in select_obj.options if option.text.strip()]
-                        logger.info(f"📋 Select {i}: {opciones}")
-                        
-                        # Verificar si contiene opciones de cuotas
-                        if any("cuota" in opcion.lower() for opcion in opciones):
-                            logger.info(f"✅ Select de cuotas encontrado en posición {i}")
-                            # Intentar seleccionar "60 cuotas"
-                            for opcion in ["60 cuotas", "60", "60 CUOTAS"]:
-                                try:
-                                    select_obj.select_by_visible_text(opcion)
-                                    logger.info(f"✅ Cuota seleccionada: {opcion}")
-                                    cuota_seleccionada = True
-                                    break
-                                except:
-                                    continue
-                            if cuota_seleccionada:
-                                break
-                    except Exception as e:
-                        continue
+                # Buscar botón que NO tenga la clase 'disable-button'
+                btn_simular = self._buscar(
+                    "button[value='SIMULAR']:not(.disable-button)", requerido=False, timeout=0
+                )
                 
-                if not cuota_seleccionada:
-                    logger.warning("⚠️ No se pudo seleccionar cuota - continuando sin ella")
+                if btn_simular.is_displayed() and btn_simular.is_enabled():
+                    logger.info(f"✅ Botón SIMULAR habilitado después de {intento+1} segundos")
                     
-                self._espera_humana(2, 3, "confirmando cuota")
-            except Exception as e:
-                logger.warning(f"⚠️ Error seleccionando cuota Angular: {e}")
+                    # Hacer scroll al botón y click
+                    self.driver.execute_script(
+                        "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", 
+                        btn_simular
+                    )
+                    self._espera_humana(1, 2, "scrolling al botón")
+                    self._click_humano(btn_simular)
+                    # Ya se envió: desde aquí un error no debe volver a clickear SIMULAR
+                    self._progreso_paso['accion'] = True
+                    boton_encontrado = True
+                    break
+            except SesionExpiradaError:
+                raise
+            except Exception:
+                pass
+            # Si no encuentra el botón habilitado, esperar 1 segundo más
+            logger.info(f"⏳ Intento {intento+1}/25: Botón Angular aún no habilitado, esperando...")
+            time.sleep(1)
+        
+        if boton_encontrado:
+            self._esperar_pagina_lista("procesando simulación Angular", selector="button[value='CONTINUAR']", timeout=60)
+            logger.info("✅ Simulación Angular ejecutada exitosamente")
+        else:
+            # Método de emergencia para Angular
+            logger.warning("⚠️ Botón SIMULAR Angular no se habilitó, intentando métodos de emergencia...")
             
-            # 5. Día de Vencimiento → Buscar en selects dinámicos
-            logger.info("📅 Seleccionando Día de Vencimiento: 2 (Angular dinámico)")
             try:
-                # Recargar los selects después de seleccionar cuota
-                selects_actualizados = self.driver.find_elements(By.CSS_SELECTOR, "select")
+                btn_simular_disabled = self._buscar("button[value='SIMULAR']", requerido=False)
+                logger.info("🔧 Intentando habilitar botón Angular con JavaScript...")
                 
-                dia_seleccionado = False
-                for i, select_elem in enumerate(selects_actualizados):
-                    try:
-                        select_obj = Select(select_elem)
-                        opciones = [option.text.strip() for option in select_obj.options if option.text.strip()]
-                        
-                        # Verificar si contiene números (días) y no es el select de productos o cuotas
-                        if (any(opcion.strip().isdigit() and opcion.strip() in ["2", "5", "10", "15"] for opcion in opciones) and 
-                            not any("cuota" in opcion.lower() or "modular" in opcion.lower() for opcion in opciones)):
-                            logger.info(f"✅ Select de días encontrado en posición {i}: {opciones}")
-                            # Intentar seleccionar "2"
-                            try:
-                                select_obj.select_by_visible_text("2")
-                                logger.info("✅ Día de vencimiento seleccionado: 2")
-                                dia_seleccionado = True
-                                break
-                            except:
-                                # Si no funciona por texto, intentar por índice
-                                try:
-                                    if len(opciones) > 1:
-                                        select_obj.select_by_index(1)  # Primera opción después de "Seleccione"
-                                        logger.info("✅ Día de vencimiento seleccionado por índice")
-                                        dia_seleccionado = True
-                                        break
-                                except:
-                                    continue
-                    except Exception as e:
-                        continue
-                
-                if not dia_seleccionado:
-                    logger.warning("⚠️ No se pudo seleccionar día de vencimiento")
-                    
-                self._espera_humana(2, 3, "confirmando día vencimiento")
-            except Exception as e:
-                logger.warning(f"⚠️ Error seleccionando día Angular: {e}")
-            
-            # ESPERAR FINAL PARA QUE ANGULAR PROCESE TODO
-            logger.info("⏳ Esperando procesamiento final Angular...")
-            self._espera_humana(4, 6, "procesamiento final Angular")
-            
-            # 6. BOTÓN SIMULAR - MEJORADO PARA ANGULAR
-            logger.info("🔘 Esperando que el botón SIMULAR se habilite (Angular)...")
-            try:
-                # Método mejorado para Angular
-                boton_encontrado = False
-                for intento in range(25):  # Aumentamos intentos para Angular
-                    try:
-                        # Buscar botón que NO tenga la clase 'disable-button'
-                        btn_simular = self.driver.find_element(
-                            By.CSS_SELECTOR, 
-                            "button[value='SIMULAR']:not(.disable-button)"
-                        )
-                        
-                        if btn_simular.is_displayed() and btn_simular.is_enabled():
-                            logger.info(f"✅ Botón SIMULAR habilitado después de {intento+1} segundos")
-                            
-                            # Hacer scroll al botón y click
-                            self.driver.execute_script(
-                                "arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", 
-                                btn_simular
-                            )
-                            self._espera_humana(1, 2, "scrolling al botón")
-                            self._click_humano(btn_simular)
-                            self._espera_humana(8, 12, "procesando simulación Angular")
-                            logger.info("✅ Simulación Angular ejecutada exitosamente")
-                            boton_encontrado = True
-                            break
-                    except:
-                        # Si no encuentra el botón habilitado, esperar 1 segundo más
-                        logger.info(f"⏳ Intento {intento+1}/25: Botón Angular aún no habilitado, esperando...")
-                        time.sleep(1)
-                        continue
+                # Script específico para componentes Angular
+                self.driver.execute_script("""
+                    var button = arguments[0];
+                    // Remover clase disable-button
+                    button.classList.remove('disable-button');
+                    // Habilitar el botón
+                    button.disabled = false;
+                    // Restablecer estilos
+                    button.style.pointerEvents = 'auto';
+                    button.style.opacity = '1';
+                    // Disparar eventos Angular
+                    button.dispatchEvent(new Event('click', { bubbles: true }));
+                """, btn_simular_disabled)
+                self._progreso_paso['accion'] = True
                 
-                if not boton_encontrado:
-                    # Método de emergencia para Angular
-                    logger.warning("⚠️ Botón SIMULAR Angular no se habilitó, intentando métodos de emergencia...")
-                    
-                    try:
-                        btn_simular_disabled = self.driver.find_element(By.CSS_SELECTOR, "button[value='SIMULAR']")
-                        logger.info("🔧 Intentando habilitar botón Angular con JavaScript...")
-                        
-                        # Script específico para componentes Angular
-                        self.driver.execute_script("""
-                            var button = arguments[0];
-                            // Remover clase disable-button
-                            button.classList.remove('disable-button');
-                            // Habilitar el botón
-                            button.disabled = false;
-                            // Restablecer estilos
-                            button.style.pointerEvents = 'auto';
-                            button.style.opacity = '1';
-                            // Disparar eventos Angular
-                            button.dispatchEvent(new Event('click', { bubbles: true }));
-                        """, btn_simular_disabled)
-                        
-                        self._espera_humana(8, 12, "procesando simulación forzada Angular")
-                        logger.info("✅ Simulación Angular ejecutada con método de emergencia")
-                        boton_encontrado = True
-                        
-                    except Exception as e:
-                        logger.error(f"❌ Método de emergencia Angular falló: {e}")
-                        self.driver.save_screenshot(f"error_simular_angular_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-                        raise Exception("Error en simulación Angular - botón no disponible")
+                self._esperar_pagina_lista("procesando simulación forzada Angular", selector="button[value='CONTINUAR']", timeout=60)
+                logger.info("✅ Simulación Angular ejecutada con método de emergencia")
                 
             except Exception as e:
-                logger.error(f"❌ Error en simulación Angular: {e}")
-                self.driver.save_screenshot(f"error_simulacion_angular_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-                raise Exception(f"Error en simulación Angular: {e}")
-            
-            # ============= CONTINUAR CON EL RESTO DEL FLUJO (IGUAL QUE ANTES) =============
-            logger.info("📄 PÁGINA 3: Después de Simulación")
-            self._espera_humana(4, 6, "cargando resultados de simulación")
-            
-            try:
-                btn_continuar = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[value='CONTINUAR']")))
-                self._click_humano(btn_continuar)
-                self._espera_humana(4, 6, "cargando información personal")
-                logger.info("✅ Continuado después de simulación")
-            except:
-                logger.error("❌ No se pudo continuar después de simulación")
-                raise Exception("Error continuando después de simulación")
-            
-            # ============= RESTO DEL FLUJO IGUAL QUE ANTES =============
-            # (Información personal, ubicación, laboral, evaluación final)
-            self._completar_resto_flujo_angular(cliente_data)
-            
-            logger.info("🎉 ¡FLUJO DE FINANCIAMIENTO ANGULAR COMPLETADO EXITOSAMENTE!")
-            
-        except Exception as e:
-            logger.error(f"❌ Error en configuración de financiamiento Angular: {e}")
-            raise
+                logger.error(f"❌ Método de emergencia Angular falló: {e}")
+                self._capturar('error_simular_angular', error=True)
+                raise Exception("Error en simulación Angular - botón no disponible")
+        
+        # ============= PÁGINA 3: DESPUÉS DE SIMULACIÓN =============
+        logger.info("📄 PÁGINA 3: Después de Simulación")
+        self._esperar_pagina_lista("cargando resultados de simulación")
+    
+    def _accion_registrar_resultado(self, cliente_data):
+        """Screenshot final, COMPLETADO en la planilla y en el diario, entrada en clientes_procesados"""
+        nombre = cliente_data['Nombre Cliente']
+        agente = cliente_data['agente']
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        screenshot_path = self._capturar(f"cliente_final_{agente.replace(' ', '_')}_{nombre.replace(' ', '_')}")
+        
+        url_resultado = self.driver.current_url
+        estado, detalle = "COMPLETADO", f"Exitoso: {url_resultado}"
+        if self._flujo_reanudado:
+            # La pantalla de resultado se perdió con la sesión: enviada, pero sin resultado que confirmar
+            estado, detalle = "REVISAR", "Enviado antes de expirar la sesión, confirmar en portal"
+        
+        resultado_cliente = {
+            'agente': agente,
+            'cliente': nombre,
+            'rut': cliente_data['RUT'],
+            'monto': int(cliente_data['Monto Financiar Original']),
+            'renta_liquida': cliente_data['RENTA LIQUIDA'],
+            'url_resultado': url_resultado,
+            'screenshot': screenshot_path,
+            'timestamp': timestamp,
+            'estado': estado,
+            'tiempos_pasos': self._tiempos_cliente
+        }
+        
+        self.actualizar_estado_cliente(cliente_data, estado, detalle)
+        if not self._flujo_reanudado:
+            self.diario.registrar(cliente_data, 'completado', url_resultado=url_resultado)
+        
+        self.clientes_procesados.append(resultado_cliente)
+        self.capturas.descartar()
+        self.bitacora_dom.descartar()
+    
 
-    def _completar_resto_flujo_angular(self, cliente_data):
-        """Completar el resto del flujo (información personal, ubicación, etc.)"""
+    def _numero_workers(self, total_clientes):
+        """Cantidad de sesiones Chrome paralelas (config 'workers' o SALVUM_WORKERS)"""
+        workers = self._leer_opcion('workers', 'SALVUM_WORKERS', 1)
+        return max(1, min(workers, total_clientes))
+    
+    def _procesar_turno_cliente(self, cliente, idx, total_clientes, pausa_previa):
+        """Procesar un cliente dentro de la sesión actual (pausa, regreso al dashboard y flujo).
+        
+        Devuelve False si la sesión se perdió y el re-login falló: no tiene sentido seguir con más clientes.
+        """
+        logger.info(f"\n{'='*20} CLIENTE {idx}/{total_clientes} {'='*20}")
+        logger.info(f"👥 Agente: {cliente['agente']}")
+        logger.info(f"👤 Cliente: {cliente['Nombre Cliente']} - {cliente['RUT']}")
+        
         try:
-            # ============= PÁGINA 4: INFORMACIÓN PERSONAL =============
-            logger.info("📄 PÁGINA 4: Información Personal")
-            self._espera_humana(3, 5, "cargando página información personal")
-            
-            # N° de serie C.I → input[id="N° de serie C.I."][name="N° de serie C.I."]
-            logger.info("🆔 Llenando N° de serie C.I: 123456789")
-            try:
-                campo_ci = self.driver.find_element(By.CSS_SELECTOR, "input[id='N° de serie C.I.'][name='N° de serie C.I.']")
-                self._click_humano(campo_ci)
-                self._tipear_humano(campo_ci, "123456789")
-                logger.info("✅ N° de serie C.I llenado")
-            except:
-                logger.warning("⚠️ No se pudo llenar N° de serie C.I")
-            
-            # Estado Civil → Seleccionar "Soltero/a" (CORREGIDO PARA EVITAR DUPLICADOS)
-            logger.info("💑 Seleccionando Estado Civil: Soltero/a")
-            try:
-                select_civil = self.driver.find_element(By.CSS_SELECTOR, "select")
-                select_obj = Select(select_civil)
+            if pausa_previa:
+                logger.info("🤔 Pausa entre clientes...")
+                self._espera_humana(8, 15, "descanso entre clientes")
                 
-                # MÉTODO 1: Intentar por valor específico para evitar duplicados
                 try:
-                    select_obj.select_by_value("7: Object")  # Soltero/a real
-                    logger.info("✅ Estado Civil seleccionado por valor: Soltero/a")
-                except:
-                    # MÉTODO 2: Si falla, usar índice (última opción de Soltero/a)
-                    try:
-                        opciones = select_obj.options
-                        for i, opcion in enumerate(opciones):
-                            if opcion.text == "Soltero/a" and not opcion.get_attribute("disabled"):
-                                select_obj.select_by_index(i)
-                                logger.info(f"✅ Estado Civil seleccionado por índice {i}: Soltero/a")
-                                break
-                    except:
-                        # MÉTODO 3: Fallback - seleccionar último índice disponible
-                        select_obj.select_by_index(-1)
-                        logger.info("✅ Estado Civil seleccionado por fallback")
-            except:
-                logger.warning("⚠️ No se pudo seleccionar Estado Civil")
-            
-            try:
-                btn_continuar = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[value='CONTINUAR']")))
-                self._click_humano(btn_continuar)
-                self._espera_humana(4, 6, "cargando ubicación")
-                logger.info("✅ Continuado después de información personal")
-            except:
-                logger.error("❌ No se pudo continuar después de información personal")
-                raise Exception("Error continuando información personal")
-            
-            # ============= PÁGINA 5: UBICACIÓN =============
-            logger.info("📄 PÁGINA 5: Ubicación")
-            self._espera_humana(3, 5, "cargando página ubicación")
-            
-            # Región → Seleccionar "COQUIMBO"
-            logger.info("🌎 Seleccionando Región: COQUIMBO")
-            try:
-                selects = self.driver.find_elements(By.CSS_SELECTOR, "select")
-                if len(selects) >= 1:
-                    select_region = Select(selects[0])
-                    select_region.select_by_visible_text("COQUIMBO")
-                    logger.info("✅ Región seleccionada: COQUIMBO")
-                    self._espera_humana(3, 5, "cargando ciudades")
-            except:
-                logger.warning("⚠️ No se pudo seleccionar región")
-            
-            # Ciudad → Seleccionar según disponibilidad (se carga dinámicamente)
-            logger.info("🏙️ Intentando seleccionar Ciudad...")
-            try:
-                self._espera_humana(2, 3, "esperando carga de ciudades")
-                selects = self.driver.find_elements(By.CSS_SELECTOR, "select")
-                if len(selects) >= 2:
-                    select_ciudad = Select(selects[1])
-                    opciones = select_ciudad.options
-                    if len(opciones) > 1:  # Más que solo "Seleccione"
-                        select_ciudad.select_by_index(1)  # Seleccionar primera opción disponible
-                        logger.info("✅ Ciudad seleccionada")
-                        self._espera_humana(3, 5, "cargando comunas")
-            except:
-                logger.warning("⚠️ No se pudo seleccionar ciudad")
-            
-            # Comuna → Seleccionar según disponibilidad (se carga dinámicamente)
-            logger.info("🏘️ Intentando seleccionar Comuna...")
-            try:
-                self._espera_humana(2, 3, "esperando carga de comunas")
-                selects = self.driver.find_elements(By.CSS_SELECTOR, "select")
-                if len(selects) >= 3:
-                    select_comuna = Select(selects[2])
-                    opciones = select_comuna.options
-                    if len(opciones) > 1:  # Más que solo "Seleccione"
-                        select_comuna.select_by_index(1)  # Seleccionar primera opción disponible
-                        logger.info("✅ Comuna seleccionada")
-            except:
-                logger.warning("⚠️ No se pudo seleccionar comuna")
-            
-            # Dirección → input[id="Dirección"][name="Dirección"]
-            logger.info("🏠 Llenando Dirección: Avenida")
-            try:
-                campo_direccion = self.driver.find_element(By.CSS_SELECTOR, "input[id='Dirección'][name='Dirección']")
-                self._click_humano(campo_direccion)
-                self._tipear_humano(campo_direccion, "Avenida")
-                logger.info("✅ Dirección llenada")
-            except:
-                logger.warning("⚠️ No se pudo llenar Dirección")
-            
-            try:
-                btn_continuar = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[value='CONTINUAR']")))
-                self._click_humano(btn_continuar)
-                self._espera_humana(4, 6, "cargando información laboral")
-                logger.info("✅ Continuado después de ubicación")
-            except:
-                logger.error("❌ No se pudo continuar después de ubicación")
-                raise Exception("Error continuando ubicación")
-            
-            # ============= PÁGINA 6: INFORMACIÓN LABORAL =============
-            logger.info("📄 PÁGINA 6: Información Laboral")
-            self._espera_humana(3, 5, "cargando página información laboral")
-            
-            # Modalidad de trabajo → Seleccionar "Jubilado"
-            logger.info("💼 Seleccionando Modalidad de trabajo: Jubilado")
-            try:
-                select_trabajo = self.driver.find_element(By.CSS_SELECTOR, "select")
-                select_obj = Select(select_trabajo)
-                select_obj.select_by_visible_text("Jubilado")
-                logger.info("✅ Modalidad de trabajo seleccionada: Jubilado")
-            except:
-                logger.warning("⚠️ No se pudo seleccionar modalidad de trabajo")
-            
-            # Última pensión líquida → input[id="import-simple"][name="import-simple"]
-            logger.info("💰 Llenando Última pensión líquida...")
-            try:
-                renta_liquida = int(cliente_data['RENTA LIQUIDA'])
-                campo_pension = self.driver.find_element(By.CSS_SELECTOR, "input[id='import-simple'][name='import-simple']")
-                self._click_humano(campo_pension)
-                self._tipear_humano(campo_pension, str(renta_liquida))
-                logger.info(f"✅ Última pensión líquida: {renta_liquida}")
-            except:
-                logger.warning("⚠️ No se pudo llenar Última pensión líquida")
-            
-            try:
-                btn_continuar = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[value='CONTINUAR']")))
-                self._click_humano(btn_continuar)
-                self._espera_humana(4, 6, "cargando página final")
-                logger.info("✅ Continuado después de información laboral")
-            except:
-                logger.error("❌ No se pudo continuar después de información laboral")
-                raise Exception("Error continuando información laboral")
-            
-            # ============= PÁGINA 7: EVALUAR SOLICITUD =============
-            logger.info("📄 PÁGINA 7: Evaluar Solicitud")
-            self._espera_humana(3, 5, "cargando página final")
+                    logger.info("🔄 Regresando al dashboard...")
+                    self.driver.get("https://prescriptores.salvum.cl/credit-request")
+                    self._esperar_pagina_lista("cargando página principal", selector="button[value='NUEVA SOLICITUD']")
+                except Exception as e:
+                    logger.warning(f"Error regresando al dashboard: {e}")
+                    self._espera_humana(3, 5, "recuperación dashboard")
             
-            # Click en EVALUAR SOLICITUD - button[value="EVALUAR SOLICITUD"]
-            logger.info("📤 Haciendo click en EVALUAR SOLICITUD...")
-            try:
-                btn_evaluar = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[value='EVALUAR SOLICITUD']")))
-                self._click_humano(btn_evaluar)
-                self._espera_humana(6, 10, "procesando evaluación final")
-                logger.info("✅ Solicitud enviada para evaluación")
-            except:
-                logger.warning("⚠️ No se encontró botón EVALUAR SOLICITUD, continuando...")
+            if self._sesion_expirada() and not self._reautenticar():
+                logger.error("🔐 Sesión perdida antes del cliente y re-login fallido - se detienen los turnos")
+                self._registrar_fallo_cliente(cliente, ErrorTransitorio("Sesión perdida antes del cliente y re-login fallido"))
+                return False
             
-            # ============= CAPTURAR RESULTADO FINAL =============
-            logger.info("📸 Capturando resultado final...")
-            self._espera_humana(5, 8, "cargando resultado final")
+            logger.info(f"👤 Procesando cliente {idx} con selectores Angular...")
+            if self._procesar_cliente_con_relogin(cliente):
+                logger.info(f"✅ Cliente {idx} completado exitosamente")
+                self._espera_humana(2, 4, "satisfacción por cliente completado")
+            else:
+                logger.error(f"❌ Cliente {idx} falló")
+                self._espera_humana(3, 6, "procesando fallo")
             
         except Exception as e:
-            logger.error(f"❌ Error completando resto del flujo Angular: {e}")
-            raise
-
-    def procesar_todos_los_clientes(self):
+            logger.error(f"❌ Error procesando cliente {idx}: {e}")
+            self._espera_humana(5, 8, "recuperándose de error")
+        
+        return True
+    
+    def _reanudar_desde_diario(self, clientes):
+        """Saltar clientes que una ejecución interrumpida ya envió al portal.
+        
+        Si la planilla no alcanzó a reflejarlo se reescribe el estado desde el diario.
+        Los que quedaron a mitad de flujo se reinician: el formulario del portal no sobrevive.
+        """
+        max_horas = self._leer_opcion('diario_max_horas', 'SALVUM_DIARIO_MAX_HORAS', 24)
+        try:
+            ultimos = self.diario.compactar(max_horas)
+        except Exception as e:
+            logger.warning(f"⚠️ Diario ilegible, no se reanuda: {e}")
+            return clientes
+        
+        pendientes = []
+        for cliente in clientes:
+            entrada = ultimos.get(DiarioClientes.clave(cliente))
+            paso = entrada['paso'] if entrada else None
+            
+            if paso == 'completado':
+                logger.info(f"⏭️ {cliente['Nombre Cliente']}: completado en ejecución anterior (diario)")
+                self.actualizar_estado_cliente(cliente, "COMPLETADO", f"Exitoso: {entrada.get('url_resultado', '')} (diario)")
+                self.clientes_reanudados += 1
+            elif paso in PASOS_TERMINALES_DIARIO:
+                logger.warning(f"⏭️ {cliente['Nombre Cliente']}: enviado sin confirmar resultado - marcado REVISAR")
+                self.actualizar_estado_cliente(cliente, "REVISAR", "Enviado en ejecución interrumpida, confirmar en portal")
+                self.clientes_reanudados += 1
+            else:
+                if paso and paso != 'error':
+                    logger.info(f"🔁 {cliente['Nombre Cliente']}: interrumpido en '{paso}', se reinicia")
+                pendientes.append(cliente)
+        
+        if self.clientes_reanudados:
+            logger.info(f"📓 Diario: {self.clientes_reanudados} clientes ya enviados, {len(pendientes)} por procesar")
+        return pendientes
+    
+    def _procesar_cliente_con_relogin(self, cliente):
+        """Procesar el cliente; si la sesión expira a mitad, re-login y un único reintento"""
+        for intento in (1, 2):
+            try:
+                return self.procesar_cliente_individual(cliente)
+            except SesionExpiradaError as e:
+                logger.warning(f"🔐 Sesión expirada procesando {cliente['Nombre Cliente']}: {e}")
+                if intento == 2 or not self._reautenticar(reiniciar_navegador=isinstance(e, NavegadorCaidoError)):
+                    self._registrar_fallo_cliente(cliente, ErrorTransitorio(f"Sesión expirada: {e}"))
+                    return False
+                logger.info("🔁 Reintentando cliente con la sesión nueva...")
+        return False
+    
+    def procesar_todos_los_clientes(self, todos_los_clientes=None):
         """Procesar todos los clientes CON SELECTORES ANGULAR CORREGIDOS"""
         logger.info("🚀 INICIANDO PROCESAMIENTO CON SELECTORES ANGULAR...")
         
-        todos_los_clientes = self.leer_todos_los_clientes()
+        if todos_los_clientes is None:
+            todos_los_clientes = self.leer_todos_los_clientes()
         
         if not todos_los_clientes:
             logger.info("ℹ️ No hay clientes para procesar en ninguna planilla")
             return True
         
+        if self._leer_opcion('reanudar', 'SALVUM_REANUDAR', True):
+            todos_los_clientes = self._reanudar_desde_diario(todos_los_clientes)
+            if not todos_los_clientes:
+                logger.info("ℹ️ Todos los clientes pendientes ya figuran terminados en el diario")
+                return True
+        
         total_clientes = len(todos_los_clientes)
         logger.info(f"📊 Total clientes a procesar: {total_clientes}")
         
+        self.inicio_procesamiento = time.monotonic()
+        self.workers_usados = self._numero_workers(total_clientes)
+        if self.workers_usados > 1:
+            return self._procesar_con_pool_workers(todos_los_clientes, self.workers_usados)
+        
         for idx, cliente in enumerate(todos_los_clientes, 1):
-            logger.info(f"\n{'='*20} CLIENTE {idx}/{total_clientes} {'='*20}")
-            logger.info(f"👥 Agente: {cliente['agente']}")
-            logger.info(f"👤 Cliente: {cliente['Nombre Cliente']} - {cliente['RUT']}")
-            
-            try:
-                if idx > 1:
-                    logger.info("🤔 Pausa entre clientes...")
-                    self._espera_humana(8, 15, "descanso entre clientes")
-                    
-                    try:
-                        logger.info("🔄 Regresando al dashboard...")
-                        self.driver.get("https://prescriptores.salvum.cl/credit-request")
-                        self._espera_humana(3, 6, "cargando página principal")
-                    except Exception as e:
-                        logger.warning(f"Error regresando al dashboard: {e}")
-                        self._espera_humana(3, 5, "recuperación dashboard")
-                
-                logger.info(f"👤 Procesando cliente {idx} con selectores Angular...")
-                if self.procesar_cliente_individual(cliente):
-                    logger.info(f"✅ Cliente {idx} completado exitosamente")
-                    self._espera_humana(2, 4, "satisfacción por cliente completado")
-                else:
-                    logger.error(f"❌ Cliente {idx} falló")
-                    self._espera_humana(3, 6, "procesando fallo")
-                
-            except Exception as e:
-                logger.error(f"❌ Error procesando cliente {idx}: {e}")
-                self._espera_humana(5, 8, "recuperándose de error")
-                continue
+            sesion_ok = self._procesar_turno_cliente(cliente, idx, total_clientes, idx > 1)
+            self._escribir_metricas()
+            if not sesion_ok:
+                # Sin sesión no se procesan los que quedan: se reportan pero no se tocan en la planilla
+                for pendiente in todos_los_clientes[idx:]:
+                    self.clientes_fallidos.append({
+                        'agente': pendiente['agente'],
+                        'cliente': pendiente['Nombre Cliente'],
+                        'rut': pendiente['RUT'],
+                        'error': 'Sin sesión (re-login fallido), no procesado',
+                        'timestamp': datetime.now().isoformat()
+                    })
+                break
         
         logger.info("🎉 ¡PROCESAMIENTO ANGULAR COMPLETADO!")
         self._espera_humana(3, 6, "finalización exitosa")
         
         return True
     
+    def _procesar_con_pool_workers(self, todos_los_clientes, num_workers):
+        """Repartir clientes entre N procesos worker, cada uno con su propio Chrome logueado"""
+        total_clientes = len(todos_los_clientes)
+        logger.info(f"👷 MODO POOL: {num_workers} workers para {total_clientes} clientes")
+        
+        # Fijar el id de ejecución antes de lanzar workers: heredan el entorno y comparten carpeta de capturas
+        os.environ.setdefault('SALVUM_ID_EJECUCION', datetime.now().strftime('%Y%m%d_%H%M%S'))
+        
+        contexto = multiprocessing.get_context('spawn')
+        cola_clientes = contexto.Queue()
+        cola_resultados = contexto.Queue()
+        
+        for idx, cliente in enumerate(todos_los_clientes, 1):
+            cola_clientes.put((idx, total_clientes, cliente))
+        
+        procesos = {}
+        for worker_id in range(1, num_workers + 1):
+            proceso = contexto.Process(
+                target=_worker_pool_clientes,
+                args=(worker_id, cola_clientes, cola_resultados),
+                name=f"salvum-worker-{worker_id}"
+            )
+            proceso.start()
+            procesos[worker_id] = proceso
+            logger.info(f"🚀 Worker {worker_id} iniciado (PID {proceso.pid})")
+        
+        workers_activos = set(procesos)
+        clientes_atendidos = 0
+        en_curso = {}  # worker_id -> (idx, cliente) que tomó y todavía no reporta
+        
+        while workers_activos:
+            try:
+                mensaje = cola_resultados.get(timeout=10)
+            except queue.Empty:
+                for worker_id in list(workers_activos):
+                    if not procesos[worker_id].is_alive():
+                        logger.warning(f"⚠️ Worker {worker_id} terminó sin reportar cierre (exit code {procesos[worker_id].exitcode})")
+                        workers_activos.discard(worker_id)
+                        if worker_id in en_curso:
+                            self._cliente_perdido_por_worker(worker_id, *en_curso.pop(worker_id))
+                continue
+            
+            if 'tomado' in mensaje:
+                en_curso[mensaje['worker']] = (mensaje['tomado'], todos_los_clientes[mensaje['tomado'] - 1])
+                continue
+            
+            self.clientes_procesados.extend(mensaje.get('procesados', []))
+            self.clientes_fallidos.extend(mensaje.get('fallidos', []))
+            self.tiempo_espera_humana += mensaje.get('espera_humana', 0.0)
+            for clave, valor in mensaje.get('busquedas', {}).items():
+                self.estadisticas_busqueda[clave] += valor
+            self.relogins += mensaje.get('relogins', 0)
+            for paso, reintentos in mensaje.get('reintentos_pasos', {}).items():
+                self.reintentos_pasos[paso] = self.reintentos_pasos.get(paso, 0) + reintentos
+            for paso, duraciones in mensaje.get('tiempos_pasos', {}).items():
+                self.tiempos_pasos.setdefault(paso, []).extend(duraciones)
+            self.metricas.fusionar(mensaje.get('metricas', []))
+            self._fusionar_red(mensaje.get('red'))
+            self._escribir_metricas()
+            
+            if mensaje.get('fin'):
+                workers_activos.discard(mensaje['worker'])
+                logger.info(f"🏁 Worker {mensaje['worker']} finalizado ({mensaje.get('atendidos', 0)} clientes)")
+                if mensaje['worker'] in en_curso:
+                    self._cliente_perdido_por_worker(mensaje['worker'], *en_curso.pop(mensaje['worker']))
+            else:
+                en_curso.pop(mensaje['worker'], None)
+                clientes_atendidos += 1
+                logger.info(f"📥 Worker {mensaje['worker']}: {clientes_atendidos}/{total_clientes} clientes atendidos")
+        
+        for proceso in procesos.values():
+            proceso.join(timeout=30)
+        
+        # Clientes que ningún worker alcanzó a tomar (p.ej. todos fallaron el login):
+        # se reportan como fallidos pero no se tocan en la planilla para el próximo run
+        while True:
+            try:
+                idx, _, cliente = cola_clientes.get_nowait()
+            except queue.Empty:
+                break
+            logger.error(f"❌ Cliente {idx} sin worker disponible: {cliente['Nombre Cliente']}")
+            self.clientes_fallidos.append({
+                'agente': cliente['agente'],
+                'cliente': cliente['Nombre Cliente'],
+                'rut': cliente['RUT'],
+                'error': 'Sin worker disponible (no procesado)',
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        logger.info("🎉 ¡PROCESAMIENTO ANGULAR COMPLETADO (POOL)!")
+        return True
+    
+    def _cliente_perdido_por_worker(self, worker_id, idx, cliente):
+        """Un worker murió (OOM de Chrome, crash) con un cliente tomado: se reporta fallido.
+        
+        No se vuelve a encolar: pudo quedar enviado en el portal y el diario lo resolverá en el próximo run.
+        """
+        logger.error(f"❌ Cliente {idx} perdido: worker {worker_id} terminó procesándolo ({cliente['Nombre Cliente']})")
+        error = f"Worker {worker_id} terminó a mitad del cliente"
+        self.actualizar_estado_cliente(cliente, "ERROR", f"Error: {error}")
+        self.clientes_fallidos.append({
+            'agente': cliente['agente'],
+            'cliente': cliente['Nombre Cliente'],
+            'rut': cliente['RUT'],
+            'error': error,
+            'timestamp': datetime.now().isoformat()
+        })
+    
+    def _texto_metricas(self, openmetrics=False):
+        """Métricas del run actual: formato de texto 0.0.4 (textfile de node_exporter) u OpenMetrics (HTTP)"""
+        lineas = []
+        
+        for nombre, lista, ayuda in (
+            ('clientes_procesados', self.clientes_procesados, 'Clientes completados en el portal'),
+            ('clientes_fallidos', self.clientes_fallidos, 'Clientes que terminaron en ERROR'),
+        ):
+            por_agente = {}
+            for cliente in lista:
+                por_agente[cliente['agente']] = por_agente.get(cliente['agente'], 0) + 1
+            familia = f"salvum_{nombre}" if openmetrics else f"salvum_{nombre}_total"
+            lineas.append(f"# TYPE {familia} counter")
+            lineas.append(f"# HELP {familia} {ayuda}")
+            for agente, total in sorted(por_agente.items()):
+                lineas.append(f"salvum_{nombre}_total{_etiquetas_openmetrics([('agente', agente)])} {total}")
+        
+        lineas.append("# TYPE salvum_paso_duracion_segundos histogram")
+        lineas.append("# HELP salvum_paso_duracion_segundos Duración de cada paso del flujo")
+        for paso, duraciones in sorted(self.tiempos_pasos.items()):
+            for limite in BUCKETS_DURACION_PASO + ['+Inf']:
+                acumulado = len(duraciones) if limite == '+Inf' else sum(1 for d in duraciones if d <= limite)
+                etiquetas = _etiquetas_openmetrics([('paso', paso), ('le', limite)])
+                lineas.append(f"salvum_paso_duracion_segundos_bucket{etiquetas} {acumulado}")
+            etiquetas = _etiquetas_openmetrics([('paso', paso)])
+            lineas.append(f"salvum_paso_duracion_segundos_sum{etiquetas} {round(sum(duraciones), 3)}")
+            lineas.append(f"salvum_paso_duracion_segundos_count{etiquetas} {len(duraciones)}")
+        
+        lineas.extend(self.metricas.lineas(openmetrics))
+        
+        duracion_seg = time.monotonic() - self.inicio_procesamiento if self.inicio_procesamiento else 0
+        total = len(self.clientes_procesados) + len(self.clientes_fallidos)
+        lineas.append("# TYPE salvum_clientes_por_hora gauge")
+        lineas.append("# HELP salvum_clientes_por_hora Throughput del run actual")
+        lineas.append(f"salvum_clientes_por_hora {round(total / (duracion_seg / 3600), 2) if duracion_seg > 0 else 0}")
+        lineas.append("# TYPE salvum_ultima_actualizacion_timestamp_segundos gauge")
+        lineas.append("# HELP salvum_ultima_actualizacion_timestamp_segundos Momento en que se generaron estas métricas")
+        lineas.append(f"salvum_ultima_actualizacion_timestamp_segundos {round(time.time(), 3)}")
+        if openmetrics:
+            lineas.append("# EOF")
+        return '\n'.join(lineas) + '\n'
+    
+    def _escribir_metricas(self):
+        """Escribir el textfile (rename atómico para que node_exporter nunca lea a medias)"""
+        archivo = self._leer_opcion('metricas_archivo', 'SALVUM_METRICAS_ARCHIVO', '')
+        if not archivo or self.worker_id is not None:
+            return
+        try:
+            directorio = os.path.dirname(os.path.abspath(archivo))
+            os.makedirs(directorio, exist_ok=True)
+            temporal = f"{archivo}.{os.getpid()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                f.write(self._texto_metricas())
+            os.replace(temporal, archivo)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron escribir métricas: {e}")
+    
+    def _iniciar_servidor_metricas(self):
+        """Servir /metrics en localhost mientras dure la ejecución (metricas_puerto > 0)"""
+        puerto = self._leer_opcion('metricas_puerto', 'SALVUM_METRICAS_PUERTO', 0)
+        if puerto <= 0 or self._servidor_metricas:
+            return
+        try:
+            manejador = type('ManejadorMetricasSalvum', (_ManejadorMetricas,), {
+                'generar_texto': staticmethod(self._texto_metricas)
+            })
+            self._servidor_metricas = ThreadingHTTPServer(('127.0.0.1', puerto), manejador)
+            threading.Thread(target=self._servidor_metricas.serve_forever, name='metricas', daemon=True).start()
+            logger.info(f"📈 Métricas OpenMetrics en http://127.0.0.1:{puerto}/metrics")
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo abrir el puerto de métricas {puerto}: {e}")
+            self._servidor_metricas = None
+    
     def generar_reporte_final(self):
         """Generar reporte final por agente"""
         logger.info("📊 Generando reporte final...")
@@ -1943,6 +4264,9 @@ class SalvumAutomacionCorregida:
                 fallidos_por_agente[agente] = []
             fallidos_por_agente[agente].append(cliente)
         
+        duracion_seg = time.monotonic() - self.inicio_procesamiento if self.inicio_procesamiento else 0
+        clientes_por_hora = round(total_clientes / (duracion_seg / 3600), 1) if duracion_seg > 0 else 0
+        
         reporte = {
             'timestamp': datetime.now().isoformat(),
             'version': 'SELECTORES_ANGULAR_CORREGIDOS',
@@ -1950,6 +4274,30 @@ class SalvumAutomacionCorregida:
             'selectores': 'BASADOS_EN_COMPONENTES_ANGULAR_REALES',
             'estados_validos_usados': ESTADOS_VALIDOS_PROCESAR,
             'total_agentes': len(self.agentes_config),
+            'workers': self.workers_usados,
+            'relogins': self.relogins,
+            'reintentos_pasos': self.reintentos_pasos,
+            'fallos_por_clase': {
+                clase: sum(1 for f in self.clientes_fallidos if f.get('clase_error') == clase)
+                for clase in ('transitorio', 'permanente')
+            },
+            'reanudados_desde_diario': self.clientes_reanudados,
+            'duplicados_omitidos': self.clientes_duplicados,
+            'chromedriver': self.resolucion_driver,
+            'busquedas_elementos': {
+                'total': self.estadisticas_busqueda['total'],
+                'no_encontradas': self.estadisticas_busqueda['fallidas'],
+                'segundos_total': round(self.estadisticas_busqueda['segundos'], 1),
+                'segundos_en_no_encontradas': round(self.estadisticas_busqueda['segundos_fallidas'], 1)
+            },
+            'ritmo': {
+                'perfil': self._ritmo()['nombre'],
+                'duracion_procesamiento_seg': round(duracion_seg, 1),
+                'espera_humana_seg': round(self.tiempo_espera_humana, 1),
+                'clientes_por_hora': clientes_por_hora
+            },
+            'tiempos_pasos': self._resumen_tiempos_pasos(),
+            'red': self._resumen_red(),
             'total_clientes': total_clientes,
             'exitosos': total_procesados,
             'fallidos': total_fallidos,
@@ -1973,6 +4321,8 @@ class SalvumAutomacionCorregida:
         logger.info(f"🔧 Configuración: Chrome sin proxy + Selectores Angular reales")
         logger.info(f"🎯 Estados válidos: {ESTADOS_VALIDOS_PROCESAR}")
         logger.info(f"👥 Total agentes: {len(self.agentes_config)}")
+        logger.info(f"👷 Workers: {self.workers_usados}")
+        logger.info(f"🎚️ Perfil de ritmo: {reporte['ritmo']['perfil']} - {clientes_por_hora} clientes/hora")
         logger.info(f"✅ Clientes exitosos: {total_procesados}")
         logger.info(f"❌ Clientes fallidos: {total_fallidos}")
         logger.info(f"📈 Tasa de éxito: {reporte['tasa_exito']}")
@@ -2023,6 +4373,8 @@ class SalvumAutomacionCorregida:
             if not self.cargar_configuracion_agentes():
                 return False
             
+            self._iniciar_servidor_metricas()
+            
             if not self.configurar_google_sheets():
                 return False
             
@@ -2032,19 +4384,23 @@ class SalvumAutomacionCorregida:
                 logger.info("ℹ️ No hay clientes para procesar")
                 return True
             
-            # Configurar navegador
-            logger.info("🔧 Configurando navegador...")
-            if not self.configurar_navegador():
-                logger.error("❌ Error configurando navegador")
-                return False
-            
-            # Realizar login
-            if not self.realizar_login():
-                logger.error("❌ Login falló")
-                return False
+            # En modo pool cada worker abre su propio navegador y hace login
+            if self._numero_workers(len(todos_los_clientes)) <= 1:
+                # Configurar navegador
+                logger.info("🔧 Configurando navegador...")
+                if not self.configurar_navegador():
+                    logger.error("❌ Error configurando navegador")
+                    return False
+                
+                # Realizar login
+                with self._cronometrar('login'):
+                    login_ok = self.realizar_login()
+                if not login_ok:
+                    logger.error("❌ Login falló")
+                    return False
             
             # Procesar clientes
-            self.procesar_todos_los_clientes()
+            self.procesar_todos_los_clientes(todos_los_clientes)
             
             # Generar reporte
             self.generar_reporte_final()
@@ -2059,6 +4415,16 @@ class SalvumAutomacionCorregida:
             return False
             
         finally:
+            if self.buffer_planillas:
+                self.buffer_planillas.cerrar()
+            
+            if self._capturas:
+                self._capturas.cerrar()
+            
+            self._escribir_metricas()
+            if self._servidor_metricas:
+                self._servidor_metricas.shutdown()
+            
             if self.driver:
                 try:
                     self.driver.quit()
@@ -2066,8 +4432,104 @@ class SalvumAutomacionCorregida:
                 except:
                     pass
 
+def _worker_pool_clientes(worker_id, cola_clientes, cola_resultados):
+    """Proceso worker del pool: sesión Chrome propia que consume clientes de la cola compartida"""
+    signal.signal(signal.SIGTERM, _terminar_por_senal)
+    automator = SalvumAutomacionCorregida()
+    automator.worker_id = worker_id
+    atendidos = 0
+    tiempos_enviados = {}
+    
+    logger.info(f"👷 Worker {worker_id}: preparando sesión...")
+    
+    try:
+        if not automator.cargar_configuracion_agentes() or not automator.configurar_google_sheets():
+            logger.error(f"❌ Worker {worker_id}: sin configuración de planillas")
+            return
+        
+        if not automator.configurar_navegador():
+            logger.error(f"❌ Worker {worker_id}: error configurando navegador")
+            return
+        
+        with automator._cronometrar('login'):
+            login_ok = automator.realizar_login()
+        if not login_ok:
+            logger.error(f"❌ Worker {worker_id}: login falló, dejando clientes para otros workers")
+            return
+        
+        while True:
+            try:
+                idx, total_clientes, cliente = cola_clientes.get(timeout=5)
+            except queue.Empty:
+                break
+            
+            # Avisar qué cliente se tomó: si el worker muere a mitad, el proceso principal lo reporta
+            cola_resultados.put({'worker': worker_id, 'tomado': idx})
+            
+            exitosos_antes = len(automator.clientes_procesados)
+            fallidos_antes = len(automator.clientes_fallidos)
+            
+            espera_antes = automator.tiempo_espera_humana
+            
+            sesion_ok = automator._procesar_turno_cliente(cliente, idx, total_clientes, atendidos > 0)
+            atendidos += 1
+            
+            cola_resultados.put({
+                'worker': worker_id,
+                'espera_humana': automator.tiempo_espera_humana - espera_antes,
+                'tiempos_pasos': _tiempos_nuevos(automator, tiempos_enviados),
+                'procesados': automator.clientes_procesados[exitosos_antes:],
+                'fallidos': automator.clientes_fallidos[fallidos_antes:]
+            })
+            
+            if not sesion_ok:
+                logger.error(f"❌ Worker {worker_id}: sin sesión, dejando clientes para otros workers")
+                break
+    
+    except Exception as e:
+        logger.error(f"❌ Worker {worker_id}: error inesperado: {e}")
+    
+    finally:
+        if automator.buffer_planillas:
+            automator.buffer_planillas.cerrar()
+        if automator._capturas:
+            automator._capturas.cerrar()
+        automator._recolectar_red()
+        cola_resultados.put({
+            'worker': worker_id,
+            'fin': True,
+            'atendidos': atendidos,
+            'busquedas': automator.estadisticas_busqueda,
+            'relogins': automator.relogins,
+            'reintentos_pasos': automator.reintentos_pasos,
+            'tiempos_pasos': _tiempos_nuevos(automator, tiempos_enviados),
+            'metricas': automator.metricas.exportar(),
+            'red': automator.estadisticas_red
+        })
+        if automator.driver:
+            try:
+                automator.driver.quit()
+                logger.info(f"🔒 Worker {worker_id}: navegador cerrado")
+            except:
+                pass
+
+def _tiempos_nuevos(automator, enviados):
+    """Duraciones por paso aún no reportadas al proceso principal"""
+    nuevos = {}
+    for paso, duraciones in automator.tiempos_pasos.items():
+        desde = enviados.get(paso, 0)
+        if len(duraciones) > desde:
+            nuevos[paso] = duraciones[desde:]
+            enviados[paso] = len(duraciones)
+    return nuevos
+
+def _terminar_por_senal(signum, frame):
+    """Convertir SIGTERM en SystemExit para que corran los finally (flush de planillas, cierre de Chrome)"""
+    raise SystemExit(f"Señal {signum} recibida")
+
 def main():
     """Función principal"""
+    signal.signal(signal.SIGTERM, _terminar_por_senal)
     automator = SalvumAutomacionCorregida()
     
     print("🇨🇱 AUTOMATIZACIÓN SALVUM - SELECTORES ANGULAR CORREGIDOS")